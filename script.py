@@ -1,165 +1,327 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import serial
 import serial.tools.list_ports
 import pandas as pd
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import matplotlib
 matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import matplotlib.dates as mdates
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from collections import deque
 import threading
 import queue
 import os
+import sys
 import math
+import json
+import struct
+import zlib
+import tempfile
 import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
 from dateutil import parser
 
 # --- ITS-90 Conversion (PRT - Platinum Resistance Thermometer) ---
-def its90_temperature(R, Rtpw=100.0):
+def its90_temperature_array(R, Rtpw=100.0):
     """
-    Converts PRT Resistance (Ohms) to Temperature (°C) using ITS-90 approximation.
+    Converts PRT resistances (Ohms, scalar or array) to temperature (°C) using the ITS-90
+    approximation; invalid readings give NaN.
     """
-    if Rtpw <= 0 or R is None or R <= 0:
-        return float('nan')
-    W = R / Rtpw
+    R = np.asarray(R, dtype=float)
     A = 3.9083e-3
     B = -5.775e-7
-    
-    discriminant = A**2 - 4 * B * (1 - W)
-    if discriminant < 0:
-        return float('nan')
-    
-    return (-A + math.sqrt(discriminant)) / (2 * B)
+    discriminant = A**2 - 4 * B * (1 - R / Rtpw)
+    with np.errstate(invalid='ignore'):
+        temperature = (-A + np.sqrt(discriminant)) / (2 * B)
+    return np.where((R > 0) & (discriminant >= 0), temperature, np.nan)
+
+# --- Thermocouple Conversion - NIST ITS-90 Polynomials ---
+# Coefficient registry per thermocouple type: 'forward' converts °C to mV and 'inverse'
+# converts mV to °C, each as (lower, upper, [c0, c1, ...]) ranges. Type K's forward
+# function also carries NIST's exponential term a0 * exp(a1 * (t - a2)^2) for t >= 0 °C.
+TC_COEFFICIENTS = {
+    'S': {
+        'forward': [
+            (-50.0, 1064.18, [
+                0.0, 5.40313308631E-03, 1.25934289740E-05, -2.32477968689E-08, 3.22028823036E-11,
+                -3.31465196389E-14, 2.55744251786E-17, -1.25068871393E-20, 2.71443176145E-24
+            ]),
+            (1064.18, 1664.5, [
+                1.32900444085E+00, 3.34509311344E-03, 6.54805192818E-06, -1.64856259209E-09, 1.29989605174E-14
+            ]),
+            (1664.5, 1768.1, [
+                1.46628232636E+02, -2.58430516752E-01, 1.63693574641E-04, -3.30439046987E-08, -9.43223690612E-15
+            ]),
+        ],
+        'inverse': [
+            (-0.235, 1.874, [
+                0.0000000000E+00, 1.8494946000E+02, -8.0050406200E+01, 1.0223743000E+02,
+                -1.5224859200E+02, 1.8882134300E+02, -1.5908594100E+02, 8.2302788000E+01,
+                -2.3418194400E+01, 2.7978626000E+00
+            ]),
+            (1.874, 11.950, [
+                1.2915071770E+01, 1.4662988630E+02, -1.5347134020E+01, 3.1459459730E+00,
+                -4.1632578390E-01, 3.1879637710E-02, -1.2916375000E-03, 2.1834750870E-05,
+                -1.4473795110E-07, 8.2112721250E-09
+            ]),
+            (10.332, 17.536, [
+                -8.0878011170E+01, 1.6215731040E+02, -8.5368694530E+00, 4.7196869760E-01,
+                -1.4416936660E-02, 2.0816188900E-04
+            ]),
+            (17.536, 18.693, [
+                5.3338751260E+04, -1.2358922980E+04, 1.0926576130E+03, -4.2656936860E+01,
+                6.2472054200E-01
+            ]),
+        ],
+    },
+    'R': {
+        'forward': [
+            (-50.0, 1064.18, [
+                0.0, 5.28961729765E-03, 1.39166589782E-05, -2.38855693017E-08, 3.56916001063E-11,
+                -4.62347666298E-14, 5.00777441034E-17, -3.73105886191E-20, 1.57716482367E-23,
+                -2.81038625251E-27
+            ]),
+            (1064.18, 1664.5, [
+                2.95157925316E+00, -2.52061251332E-03, 1.59564501865E-05, -7.64085947576E-09,
+                2.05305291024E-12, -2.93359668173E-16
+            ]),
+            (1664.5, 1768.1, [
+                1.52232118209E+02, -2.68819888545E-01, 1.71280280471E-04, -3.45895706453E-08, -9.34633971046E-15
+            ]),
+        ],
+        'inverse': [
+            (-0.226, 1.923, [
+                0.0, 1.8891380E+02, -9.3835290E+01, 1.3068619E+02, -2.2703580E+02, 3.5145659E+02,
+                -3.8953900E+02, 2.8239471E+02, -1.2607281E+02, 3.1353611E+01, -3.3187769E+00
+            ]),
+            (1.923, 13.228, [
+                1.334584505E+01, 1.472644573E+02, -1.844024844E+01, 4.031129726E+00, -6.249428360E-01,
+                6.468412046E-02, -4.458750426E-03, 1.994710149E-04, -5.313401790E-06, 6.481976217E-08
+            ]),
+            (11.361, 19.739, [
+                -8.199599416E+01, 1.553962042E+02, -8.342197663E+00, 4.279433549E-01,
+                -1.191577910E-02, 1.492290091E-04
+            ]),
+            (19.739, 21.103, [
+                3.406177836E+04, -7.023729171E+03, 5.582903813E+02, -1.952394635E+01, 2.560740231E-01
+            ]),
+        ],
+    },
+    'B': {
+        'forward': [
+            (0.0, 630.615, [
+                0.0, -2.46508183460E-04, 5.90404211710E-06, -1.32579316360E-09, 1.56682919010E-12,
+                -1.69445292400E-15, 6.29903470940E-19
+            ]),
+            (630.615, 1820.0, [
+                -3.89381686210E+00, 2.85717474700E-02, -8.48851047850E-05, 1.57852801640E-07,
+                -1.68353448640E-10, 1.11097940130E-13, -4.45154310330E-17, 9.89756408210E-21,
+                -9.37913302890E-25
+            ]),
+        ],
+        'inverse': [
+            (0.291, 2.431, [
+                9.8423321E+01, 6.9971500E+02, -8.4765304E+02, 1.0052644E+03, -8.3345952E+02,
+                4.5508542E+02, -1.5523037E+02, 2.9886750E+01, -2.4742860E+00
+            ]),
+            (2.431, 13.820, [
+                2.1315071E+02, 2.8510504E+02, -5.2742887E+01, 9.9160804E+00, -1.2965303E+00,
+                1.1195870E-01, -6.0625199E-03, 1.8661696E-04, -2.4878585E-06
+            ]),
+        ],
+    },
+    'K': {
+        'forward': [
+            (-270.0, 0.0, [
+                0.0, 3.94501280250E-02, 2.36223735980E-05, -3.28589067840E-07, -4.99048287770E-09,
+                -6.75090591730E-11, -5.74103274280E-13, -3.10888728940E-15, -1.04516093650E-17,
+                -1.98892668780E-20, -1.63226974860E-23
+            ]),
+            (0.0, 1372.0, [
+                -1.76004136860E-02, 3.89212049750E-02, 1.85587700320E-05, -9.94575928740E-08,
+                3.18409457190E-10, -5.60728448890E-13, 5.60750590590E-16, -3.20207200030E-19,
+                9.71511471520E-23, -1.21047212750E-26
+            ]),
+        ],
+        'exponential': (1.185976E-01, -1.183432E-04, 1.269686E+02),
+        'inverse': [
+            (-5.891, 0.0, [
+                0.0, 2.5173462E+01, -1.1662878E+00, -1.0833638E+00, -8.9773540E-01, -3.7342377E-01,
+                -8.6632643E-02, -1.0450598E-02, -5.1920577E-04
+            ]),
+            (0.0, 20.644, [
+                0.0, 2.508355E+01, 7.860106E-02, -2.503131E-01, 8.315270E-02, -1.228034E-02,
+                9.804036E-04, -4.413030E-05, 1.057734E-06, -1.052755E-08
+            ]),
+            (20.644, 54.886, [
+                -1.318058E+02, 4.830222E+01, -1.646031E+00, 5.464731E-02, -9.650715E-04,
+                8.802193E-06, -3.110810E-08
+            ]),
+        ],
+    },
+    'N': {
+        'forward': [
+            (-270.0, 0.0, [
+                0.0, 2.61591059620E-02, 1.09574842280E-05, -9.38411115540E-08, -4.64120397590E-11,
+                -2.63033577160E-12, -2.26534380030E-14, -7.60893007910E-17, -9.34196678350E-20
+            ]),
+            (0.0, 1300.0, [
+                0.0, 2.59293946010E-02, 1.57101418800E-05, 4.38256272370E-08, -2.52611697940E-10,
+                6.43118193390E-13, -1.00634715190E-15, 9.97453389920E-19, -6.08632456070E-22,
+                2.08492293390E-25, -3.06821961510E-29
+            ]),
+        ],
+        'inverse': [
+            (-3.990, 0.0, [
+                0.0, 3.8436847E+01, 1.1010485E+00, 5.2229312E+00, 7.2060525E+00, 5.8488586E+00,
+                2.7754916E+00, 7.7075166E-01, 1.1582665E-01, 7.3138868E-03
+            ]),
+            (0.0, 20.613, [
+                0.0, 3.86896E+01, -1.08267E+00, 4.70205E-02, -2.12169E-06, -1.17272E-04,
+                5.39280E-06, -7.98156E-08
+            ]),
+            (20.613, 47.513, [
+                1.972485E+01, 3.300943E+01, -3.915159E-01, 9.855391E-03, -1.274371E-04, 7.767022E-07
+            ]),
+        ],
+    },
+}
+TC_TYPES = list(TC_COEFFICIENTS)
+
+def compile_tc_ranges(ranges):
+    """Packs (lower, upper, coeffs) ranges into arrays: upper bounds and a zero-padded coefficient matrix."""
+    order = max(len(coeffs) for _, _, coeffs in ranges)
+    coeffs = np.zeros((len(ranges), order))
+    for i, (_, _, c) in enumerate(ranges):
+        coeffs[i, :len(c)] = c
+    return {'upper': np.array([upper for _, upper, _ in ranges]), 'coeffs': coeffs}
 
-# --- Type S Thermocouple Conversion - NIST Standard Polynomial ---
-def emf_to_temperature_nist(emf_mV: float) -> float | str:
+def evaluate_tc_ranges(table, x):
     """
-    NIST Standard Method: Converts EMF (mV) to Temperature (°C) for Type S thermocouple.
+    Evaluates a compiled piecewise polynomial on an array with one vectorized Horner pass.
+    Each value uses the first range whose upper bound covers it; values outside the table
+    are extrapolated with the first or last range.
     """
-    if emf_mV is None or math.isnan(emf_mV):
-        return float('nan')
-    
-    ranges = [
-        (-0.235, 1.874, [
-            0.0000000000E+00, 1.8494946000E+02, -8.0050406200E+01, 1.0223743000E+02,
-            -1.5224859200E+02, 1.8882134300E+02, -1.5908594100E+02, 8.2302788000E+01,
-            -2.3418194400E+01, 2.7978626000E+00
-        ]),
-        (1.874, 11.950, [
-            1.2915071770E+01, 1.4662988630E+02, -1.5347134020E+01, 3.1459459730E+00,
-            -4.1632578390E-01, 3.1879637710E-02, -1.2916375000E-03, 2.1834750870E-05,
-            -1.4473795110E-07, 8.2112721250E-09
-        ]),
-        (10.332, 17.536, [
-            -8.0878011170E+01, 1.6215731040E+02, -8.5368694530E+00, 4.7196869760E-01,
-            -1.4416936660E-02, 2.0816188900E-04
-        ]),
-        (17.536, 18.693, [
-            5.3338751260E+04, -1.2358922980E+04, 1.0926576130E+03, -4.2656936860E+01,
-            6.2472054200E-01
-        ])
-    ]
-
-    for (v_min, v_max, coeffs) in ranges:
-        if (v_min - 1e-6) <= emf_mV <= (v_max + 1e-6):
-            temperature = 0
-            for i, c_val in enumerate(coeffs):
-                temperature += c_val * (emf_mV ** i)
-            return temperature
-            
-    if emf_mV < ranges[0][0]:
-        coeffs = ranges[0][2]
-        temperature = 0
-        for i, c_val in enumerate(coeffs):
-            temperature += c_val * (emf_mV ** i)
-        return temperature
-    elif emf_mV > ranges[-1][1]:
-        coeffs = ranges[-1][2]
-        temperature = 0
-        for i, c_val in enumerate(coeffs):
-            temperature += c_val * (emf_mV ** i)
-        return temperature
-
-    return float('nan')
+    idx = np.minimum(np.searchsorted(table['upper'] + 1e-6, x, side='left'), len(table['upper']) - 1)
+    coeffs = table['coeffs'][idx]
+    result = coeffs[:, -1].copy()
+    for k in range(coeffs.shape[1] - 2, -1, -1):
+        result = result * x + coeffs[:, k]
+    return result
+
+TC_TABLES = {
+    tc_type: {'forward': compile_tc_ranges(spec['forward']), 'inverse': compile_tc_ranges(spec['inverse']),
+              'exponential': spec.get('exponential')}
+    for tc_type, spec in TC_COEFFICIENTS.items()
+}
+
+def tc_temperature_to_emf(temp_c, tc_type='S'):
+    """Converts temperatures (°C, scalar or array) to thermocouple EMF (mV) for a 0 °C reference junction."""
+    table = TC_TABLES[tc_type]
+    t = np.atleast_1d(np.asarray(temp_c, dtype=float))
+    emf = evaluate_tc_ranges(table['forward'], t)
+    if table['exponential'] is not None:
+        a0, a1, a2 = table['exponential']
+        emf = emf + np.where(t >= 0, a0 * np.exp(a1 * (t - a2) ** 2), 0.0)
+    return emf
 
 # --- Type S Thermocouple Conversion - Custom Chart Interpolation ---
-def convert_emf_to_temp_table_interpolation(measured_emf_mv: float) -> float | str:
-    """
-    Converts EMF (mV) to Temperature (°C) using linear interpolation from Type S calibration table.
-    """
-    calibration_data = [
-        (0.00000, 0), (0.05514, 10), (0.11266, 20), (0.17244, 30), (0.23436, 40),
-        (0.29829, 50), (0.36414, 60), (0.43179, 70), (0.50115, 80), (0.57214, 90),
-        (0.64466, 100), (0.71863, 110), (0.79397, 120), (0.87062, 130), (0.94850, 140),
-        (1.02755, 150), (1.10771, 160), (1.18891, 170), (1.27112, 180), (1.35427, 190),
-        (1.43831, 200), (1.52321, 210), (1.60892, 220), (1.69540, 230), (1.78261, 240),
-        (1.87051, 250), (1.95908, 260), (2.04828, 270), (2.13809, 280), (2.22847, 290),
-        (2.31941, 300), (2.41087, 310), (2.50283, 320), (2.59528, 330), (2.68820, 340),
-        (2.78157, 350), (2.87537, 360), (2.96958, 370), (3.06420, 380), (3.15921, 390),
-        (3.25460, 400), (3.35035, 410), (3.44647, 420), (3.54293, 430), (3.63974, 440),
-        (3.73688, 450), (3.83436, 460), (3.93215, 470), (4.03027, 480), (4.12871, 490),
-        (4.22745, 500), (4.32651, 510), (4.42587, 520), (4.52554, 530), (4.62552, 540),
-        (4.72581, 550), (4.82639, 560), (4.92729, 570), (5.02849, 580), (5.12999, 590),
-        (5.23181, 600), (5.33394, 610), (5.43637, 620), (5.53913, 630), (5.64219, 640),
-        (5.74558, 650), (5.84929, 660), (5.95332, 670), (6.05767, 680), (6.16236, 690),
-        (6.26737, 700), (6.37272, 710), (6.47840, 720), (6.58442, 730), (6.69078, 740),
-        (6.79748, 750), (6.90453, 760), (7.01192, 770), (7.11965, 780), (7.22773, 790),
-        (7.33616, 800), (7.44493, 810), (7.55406, 820), (7.66353, 830), (7.77335, 840),
-        (7.88352, 850), (7.99403, 860), (8.10489, 870), (8.21609, 880), (8.32763, 890),
-        (8.43951, 900), (8.55173, 910), (8.66429, 920), (8.77718, 930), (8.89039, 940),
-        (9.00394, 950), (9.11781, 960), (9.23201, 970), (9.34652, 980), (9.46136, 990),
-        (9.57651, 1000), (9.69197, 1010), (9.80776, 1020), (9.92385, 1030), (10.04027, 1040),
-        (10.15700, 1050), (10.27406, 1060), (10.39143, 1070), (10.50907, 1080), (10.62698, 1090),
-        (10.74513, 1100), (10.86353, 1110), (10.98215, 1120), (11.10100, 1130), (11.22006, 1140),
-        (11.33932, 1150), (11.45877, 1160), (11.57841, 1170), (11.69822, 1180), (11.81820, 1190),
-        (11.938, 1200)
-    ]
-
-    min_emf = calibration_data[0][0]
-    max_emf = calibration_data[-1][0]
-
-    if measured_emf_mv < min_emf - 1e-6:
-        emf1, temp1 = calibration_data[0]
-        emf2, temp2 = calibration_data[1]
-        if (emf2 - emf1) == 0: return temp1 
-        return temp1 + (measured_emf_mv - emf1) * (temp2 - temp1) / (emf2 - emf1)
-    
-    if measured_emf_mv > max_emf + 1e-6:
-        emf1, temp1 = calibration_data[-2]
-        emf2, temp2 = calibration_data[-1]
-        if (emf2 - emf1) == 0: return temp1 
-        return temp1 + (measured_emf_mv - emf1) * (temp2 - temp1) / (emf2 - emf1)
-
-    for i in range(len(calibration_data) - 1):
-        emf1, temp1 = calibration_data[i]
-        emf2, temp2 = calibration_data[i + 1]
-        if emf1 <= measured_emf_mv <= emf2:
-            if (emf2 - emf1) == 0: 
-                return temp1
-            return temp1 + (measured_emf_mv - emf1) * (temp2 - temp1) / (emf2 - emf1)
-            
-    return float('nan')
+TYPE_S_CHART_TABLE = [
+    (0.00000, 0), (0.05514, 10), (0.11266, 20), (0.17244, 30), (0.23436, 40),
+    (0.29829, 50), (0.36414, 60), (0.43179, 70), (0.50115, 80), (0.57214, 90),
+    (0.64466, 100), (0.71863, 110), (0.79397, 120), (0.87062, 130), (0.94850, 140),
+    (1.02755, 150), (1.10771, 160), (1.18891, 170), (1.27112, 180), (1.35427, 190),
+    (1.43831, 200), (1.52321, 210), (1.60892, 220), (1.69540, 230), (1.78261, 240),
+    (1.87051, 250), (1.95908, 260), (2.04828, 270), (2.13809, 280), (2.22847, 290),
+    (2.31941, 300), (2.41087, 310), (2.50283, 320), (2.59528, 330), (2.68820, 340),
+    (2.78157, 350), (2.87537, 360), (2.96958, 370), (3.06420, 380), (3.15921, 390),
+    (3.25460, 400), (3.35035, 410), (3.44647, 420), (3.54293, 430), (3.63974, 440),
+    (3.73688, 450), (3.83436, 460), (3.93215, 470), (4.03027, 480), (4.12871, 490),
+    (4.22745, 500), (4.32651, 510), (4.42587, 520), (4.52554, 530), (4.62552, 540),
+    (4.72581, 550), (4.82639, 560), (4.92729, 570), (5.02849, 580), (5.12999, 590),
+    (5.23181, 600), (5.33394, 610), (5.43637, 620), (5.53913, 630), (5.64219, 640),
+    (5.74558, 650), (5.84929, 660), (5.95332, 670), (6.05767, 680), (6.16236, 690),
+    (6.26737, 700), (6.37272, 710), (6.47840, 720), (6.58442, 730), (6.69078, 740),
+    (6.79748, 750), (6.90453, 760), (7.01192, 770), (7.11965, 780), (7.22773, 790),
+    (7.33616, 800), (7.44493, 810), (7.55406, 820), (7.66353, 830), (7.77335, 840),
+    (7.88352, 850), (7.99403, 860), (8.10489, 870), (8.21609, 880), (8.32763, 890),
+    (8.43951, 900), (8.55173, 910), (8.66429, 920), (8.77718, 930), (8.89039, 940),
+    (9.00394, 950), (9.11781, 960), (9.23201, 970), (9.34652, 980), (9.46136, 990),
+    (9.57651, 1000), (9.69197, 1010), (9.80776, 1020), (9.92385, 1030), (10.04027, 1040),
+    (10.15700, 1050), (10.27406, 1060), (10.39143, 1070), (10.50907, 1080), (10.62698, 1090),
+    (10.74513, 1100), (10.86353, 1110), (10.98215, 1120), (11.10100, 1130), (11.22006, 1140),
+    (11.33932, 1150), (11.45877, 1160), (11.57841, 1170), (11.69822, 1180), (11.81820, 1190),
+    (11.938, 1200)
+]
+
+TYPE_S_CHART_EMF = np.array([emf for emf, _ in TYPE_S_CHART_TABLE])
+TYPE_S_CHART_TEMP = np.array([temp for _, temp in TYPE_S_CHART_TABLE], dtype=float)
+
+def chart_emf_to_temperature(emf_mV):
+    """
+    Converts EMF (mV, scalar or array) to temperature (°C) by linear interpolation in the
+    Type S calibration table, extrapolating the end segments outside it.
+    """
+    emf = np.atleast_1d(np.asarray(emf_mV, dtype=float))
+    e, t = TYPE_S_CHART_EMF, TYPE_S_CHART_TEMP
+    result = np.interp(emf, e, t)
+    low, high = emf < e[0], emf > e[-1]
+    result[low] = t[0] + (emf[low] - e[0]) * (t[1] - t[0]) / (e[1] - e[0])
+    result[high] = t[-2] + (emf[high] - e[-2]) * (t[-1] - t[-2]) / (e[-1] - e[-2])
+    return result
+
+def display_temperature(temp_prt, temp_chart, temp_nist):
+    """Returns the temperature shown for a channel (scalars or arrays): PRT, else Chart, else NIST."""
+    return np.where(np.isnan(temp_prt), np.where(np.isnan(temp_chart), temp_nist, temp_chart), temp_prt)
 
 # --- Configuration ---
 channel_configs = {
-    1: {'type': 'RES', 'unit': 'O', 'enabled': None},
-    2: {'type': 'RES', 'unit': 'O', 'enabled': None},
-    3: {'type': 'TC', 'unit': 'MV', 'enabled': None},
-    4: {'type': 'TC', 'unit': 'MV', 'enabled': None},
+    1: {'type': 'RES', 'unit': 'O', 'enabled': None, 'tc_type': 'S', 'cj_channel': None},
+    2: {'type': 'RES', 'unit': 'O', 'enabled': None, 'tc_type': 'S', 'cj_channel': None},
+    3: {'type': 'TC', 'unit': 'MV', 'enabled': None, 'tc_type': 'S', 'cj_channel': None},
+    4: {'type': 'TC', 'unit': 'MV', 'enabled': None, 'tc_type': 'S', 'cj_channel': None},
 }
 
+def channel_enabled(channel):
+    """Returns whether a channel is enabled; every channel counts as enabled when no GUI exists."""
+    enabled = channel_configs[channel]['enabled']
+    if enabled is None or isinstance(enabled, bool):  # bool: set from a replayed capture's configuration
+        return enabled is not False
+    return enabled.get()
+
 SAVE_DIR = os.path.expanduser("~/Desktop")
 PLOT_MAX_POINTS = 300
-PLOT_UPDATE_INTERVAL_MS = 500
+INGEST_POLL_MS = 50            # How often the GUI thread checks for new samples and record timeouts
+RENDER_MIN_INTERVAL_MS = 50    # Fastest frame rate when samples arrive quickly
+RENDER_MAX_INTERVAL_MS = 1000  # Slowest frame rate when rendering is expensive
+RENDER_COST_FACTOR = 4         # Keep rendering below 1/RENDER_COST_FACTOR of the GUI thread's time
+SERIAL_READ_TIMEOUT = 0.2      # Blocking readline timeout; also bounds command latency
 SAVE_INTERVAL_RECORDS = 60
 SAVE_INTERVAL_SECONDS = 300
+SEPARATE_WINDOW_REFRESH_MS = 1000
+SEPARATE_WINDOW_REFRESH_CHOICES = {"0.5s": 500, "1s": 1000, "2s": 2000, "5s": 5000, "10s": 10000}
+ALARM_HISTORY_LINES = 50
+HISTORY_REFRESH_DELAY_MS = 30  # Debounce between a zoom/pan step and re-reading the archive
+CALIBRATION_REFRESH_MS = 1000
 TIMESTAMP_TIMEOUT = 2  # Timeout in seconds for grouping channel data by timestamp
+TRANSPORT_BATCH_MAX = 256  # Most lines the serial thread parses per hand-over
+TRANSPORT_CAPACITY = 4096  # Preallocated samples per transport buffer (grows if the GUI falls behind)
+VERBOSE_SERIAL_LOG = False  # Print every raw line, queued sample and assembled record
+
+# Memory budgets: each structure that can grow during an unattended run has a hard cap.
+# Overflow of the transport and of the save buffers spills to temporary files instead of RAM.
+TRANSPORT_MAX_SAMPLES = 65536   # Per transport buffer (~6 MB); later samples spill until the GUI catches up
+PENDING_RECORDS_MAX = 1000      # Timestamps awaiting channels; the oldest are saved partial beyond this
+SAVE_BUFFER_MAX_ROWS = 10000    # Unsaved Excel records / archive rows kept in memory; older ones spill
+SAVE_BATCH_ROWS = 5000          # Rows written per save call when a backlog is being saved
+SAVE_RETRY_SECONDS = 60         # Wait after a failed save before trying again
+ARCHIVE_CACHE_FILES = 32        # Archive indexes kept cached (~0.6 MB per day logged at 1 s); least recently used are dropped
+ALARM_EVENTS_MAX = 1000         # Alarm events waiting for the GUI; newer ones are dropped beyond this
+DIAGNOSTICS_REFRESH_MS = 1000
 
-new_records_buffer = []
 current_record = {}  # {timestamp: {channel: {data}}}
 plot_timestamps = deque(maxlen=PLOT_MAX_POINTS)
 plot_data = {
@@ -185,161 +347,1864 @@ active_plot_channel = 1
 plot_type = 'temp'
 separate_windows = {i: False for i in range(1, 5)}
 stop_event = threading.Event()
-data_queue = queue.Queue()
 command_queue = queue.Queue()
 ser = None
-ani = None
+samples_ready = threading.Event()
+ingest_after_id = None
+render_after_id = None
+render_interval_ms = RENDER_MIN_INTERVAL_MS
+last_render_time = 0.0
 last_save_time = 0
+save_retry_time = 0
+excel_save_failing = False
+last_taken_receive_time = None  # Receive time of the newest sample the GUI thread has taken
+
+# --- Columnar Archive ---
+# Each day's log is an append-only file of zlib-compressed chunks (one per save),
+# stored column by column, plus a fixed-width ".idx" sidecar holding each chunk's
+# offset and min/max statistics so range queries only decompress the chunks they need.
+ARCHIVE_FIELDS = ('resistance', 'temp_prt', 'emf', 'temp_nist', 'temp_chart', 'difference')
+ARCHIVE_COLUMNS = ['timestamp'] + [f'ch{i}_{field}' for i in range(1, 5) for field in ARCHIVE_FIELDS]
+ARCHIVE_MAGIC = b'F1529ARC'
+ARCHIVE_EXTENSION = '.f1529'
+ARCHIVE_COMPRESSION_LEVEL = 6
+ARCHIVE_EPOCH = datetime(1970, 1, 1)
+ARCHIVE_IMPORT_CHUNK_ROWS = 3600
+ARCHIVE_DECIMATE_CHUNKS_PER_BUCKET = 4  # History views switch to index-only plotting above n_buckets / 4 chunks
+EXCEL_MAX_DATA_ROWS = 1048575  # Excel's 1,048,576 row limit minus the header row
+EXPORT_SHEETS_PER_FILE = 4
+EXCEL_FIELD_LABELS = {
+    'resistance': 'PRT Resistance (Ω)',
+    'temp_prt': 'PRT Temperature (°C)',
+    'emf': 'TC EMF (mV)',
+    'temp_nist': 'TC Temp (NIST) (°C)',
+    'temp_chart': 'TC Temp (Chart) (°C)',
+    'difference': 'Difference (Chart - NIST) (°C)',
+}
+EXCEL_TYPE_FIELDS = {
+    'RES': ('resistance', 'temp_prt'),
+    'TC': ('emf', 'temp_nist', 'temp_chart', 'difference'),
+}
+
+archive_header_cache = {}  # {path: (columns, data_start)}
+archive_index_cache = {}   # {path: index entries array}
+
+# --- Alarm Engine ---
+# Rules are evaluated in the serial thread as each sample is parsed, so alarm latency does
+# not depend on the GUI. Each rule is a dict:
+#   {'name': 'Furnace over-temp', 'channel': 3, 'kind': 'high', 'limit': 1100, 'hysteresis': 2}
+# kind: 'high' / 'low'  - value above / below limit (field defaults to the channel temperature)
+#       'rate'          - |rate of change| above limit, in units per minute
+#       'difference'    - |Chart - NIST| above limit (thermocouple channels)
+#       'timeout'       - no sample from the channel for limit seconds
+# An active alarm clears only once the value is back inside limit -/+ hysteresis.
+ALARM_RULES = []
+ALARM_RULES_FILE = "fluke_1529_alarms.json"  # Optional rule list in the save directory, overrides ALARM_RULES
+ALARM_LOG_FILE = "fluke_1529_alarms.log"
+ALARM_RATE_MIN_INTERVAL = 1.0  # Seconds between the two samples a rate of change is computed from
+
+alarm_state = {'rules_by_channel': {}, 'timeout_rules': [], 'last_seen': {}}
+alarm_log_dir = SAVE_DIR
+alarm_actions = []  # Callables taking an alarm event dict; run in the acquisition thread, so keep them fast
+
+def compile_alarm_rules(rules):
+    """Validates alarm rule dicts and precompiles their threshold checks per channel."""
+    rules_by_channel = {ch: [] for ch in range(1, 5)}
+    timeout_rules = []
+    for spec in rules:
+        kind = spec['kind']
+        channel = int(spec['channel'])
+        limit = float(spec['limit'])
+        hysteresis = abs(float(spec.get('hysteresis', 0.0)))
+        rule = {
+            'name': spec.get('name', f"Ch{channel} {kind}"), 'channel': channel, 'kind': kind,
+            'field': spec.get('field', 'temp'), 'limit': limit, 'active': False, 'prev': None
+        }
+        if kind == 'difference':
+            rule['field'] = 'difference'
+        if rule['field'] not in ('temp',) + ARCHIVE_FIELDS:
+            raise ValueError(f"Unknown alarm field '{rule['field']}' in rule {rule['name']}")
+        # Each check receives (value, active) and returns the new active state; the trip
+        # threshold applies while inactive and the hysteresis-shifted one while active.
+        if kind == 'high':
+            clear = limit - hysteresis
+            rule['check'] = lambda v, active, limit=limit, clear=clear: v > (clear if active else limit)
+        elif kind == 'low':
+            clear = limit + hysteresis
+            rule['check'] = lambda v, active, limit=limit, clear=clear: v < (clear if active else limit)
+        elif kind in ('rate', 'difference'):
+            clear = limit - hysteresis
+            rule['check'] = lambda v, active, limit=limit, clear=clear: abs(v) > (clear if active else limit)
+        elif kind == 'timeout':
+            timeout_rules.append(rule)
+            continue
+        else:
+            raise ValueError(f"Unknown alarm kind '{kind}' in rule {rule['name']}")
+        rules_by_channel[channel].append(rule)
+    return rules_by_channel, timeout_rules
+
+def load_alarm_rules(rules):
+    """Compiles and installs a rule list, resetting all alarm state."""
+    rules_by_channel, timeout_rules = compile_alarm_rules(rules)
+    alarm_state.update({'rules_by_channel': rules_by_channel, 'timeout_rules': timeout_rules, 'last_seen': {}})
+
+def read_alarm_rules(save_dir):
+    """Returns the rules from ALARM_RULES_FILE in save_dir if present, else ALARM_RULES."""
+    path = os.path.join(save_dir, ALARM_RULES_FILE)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return ALARM_RULES
+
+def fire_alarm(rule, active, value, now):
+    """Passes an alarm raise/clear event to every registered action."""
+    event = {
+        'name': rule['name'], 'channel': rule['channel'], 'kind': rule['kind'], 'active': active,
+        'value': value, 'limit': rule['limit'], 'time': datetime.now(), 'monotonic': now
+    }
+    for action in alarm_actions:
+        try:
+            action(event)
+        except Exception as e:
+            print(f"Alarm action {getattr(action, '__name__', action)} failed: {e}")
+
+def evaluate_alarms(channel, values, now):
+    """
+    Evaluates the channel's rules against one converted sample (a SAMPLE_DTYPE row or any
+    mapping with 'timestamp', 'temp' and the ARCHIVE_FIELDS); now is the sample's
+    time.monotonic() receive time, used only for the timeout rules.
+    """
+    alarm_state['last_seen'][channel] = now
+    for rule in alarm_state['timeout_rules']:
+        if rule['channel'] == channel and rule['active']:
+            rule['active'] = False
+            fire_alarm(rule, False, 0.0, now)
+    for rule in alarm_state['rules_by_channel'].get(channel, ()):
+        value = float(values[rule['field']])
+        if rule['kind'] == 'rate':
+            # Rates use the instrument timestamp: receive times bunch up after a serial stall
+            sample_time = float(values['timestamp'])
+            prev = rule['prev']
+            if prev is None or value != value:
+                rule['prev'] = (sample_time, value)
+                continue
+            if sample_time - prev[0] < ALARM_RATE_MIN_INTERVAL:
+                continue
+            rule['prev'] = (sample_time, value)
+            value = (value - prev[1]) / (sample_time - prev[0]) * 60.0
+        if value != value:  # NaN readings leave the alarm state unchanged
+            continue
+        active = rule['check'](value, rule['active'])
+        if active != rule['active']:
+            rule['active'] = active
+            fire_alarm(rule, active, value, now)
+
+def check_alarm_timeouts(now):
+    """Raises timeout alarms for channels that have been silent longer than their limit."""
+    for rule in alarm_state['timeout_rules']:
+        last_seen = alarm_state['last_seen'].setdefault(rule['channel'], now)
+        if not rule['active'] and now - last_seen >= rule['limit']:
+            rule['active'] = True
+            fire_alarm(rule, True, now - last_seen, now)
+
+def alarm_action_queue(event_queue):
+    """Returns an action handing events to a bounded queue; events are dropped when it is full so acquisition never blocks."""
+    def action(event):
+        try:
+            event_queue.put_nowait(event)
+        except queue.Full:
+            pass
+    return action
+
+def alarm_action_print(event):
+    """Alarm action: prints raise/clear events to the console."""
+    state = "ALARM" if event['active'] else "CLEARED"
+    print(f"{state}: {event['name']} (Ch{event['channel']} {event['kind']}) value={event['value']:.4f} limit={event['limit']}")
+
+def alarm_action_log_file(event):
+    """Alarm action: appends raise/clear events to ALARM_LOG_FILE in alarm_log_dir."""
+    path = os.path.join(alarm_log_dir, ALARM_LOG_FILE)
+    state = "ALARM" if event['active'] else "CLEARED"
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(f"{event['time']:%Y-%m-%d %H:%M:%S.%f},{state},{event['name']},{event['channel']},"
+                f"{event['kind']},{event['value']:.6g},{event['limit']}\n")
+
+alarm_actions.append(alarm_action_print)
+alarm_actions.append(alarm_action_log_file)
+
+def archive_index_dtype(n_columns):
+    """Returns the NumPy dtype of one index entry for an archive with n_columns columns."""
+    return np.dtype([
+        ('offset', '<u8'), ('length', '<u4'), ('rows', '<u4'),
+        ('t_min', '<f8'), ('t_max', '<f8'),
+        ('col_min', '<f8', (n_columns,)), ('col_max', '<f8', (n_columns,))
+    ])
+
+def archive_path(save_dir, day):
+    """Returns the archive file path for a given date."""
+    return os.path.join(save_dir, f"fluke_1529_{day.strftime('%Y%m%d')}{ARCHIVE_EXTENSION}")
+
+def to_epoch_seconds(value):
+    """
+    Converts a datetime, date/time string or number to archive seconds.
+    Archive timestamps are the instrument's wall-clock time counted from 1970-01-01,
+    so they map back to the same local time without any timezone or DST handling.
+    """
+    if isinstance(value, str):
+        value = parser.parse(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return (value - ARCHIVE_EPOCH).total_seconds()
+    return float(value)
+
+def from_epoch_seconds(seconds):
+    """Converts archive seconds back to a naive datetime."""
+    return ARCHIVE_EPOCH + timedelta(seconds=float(seconds))
+
+def archive_columns(path):
+    """Reads (and caches) the column names stored in an archive file header."""
+    if path not in archive_header_cache:
+        with open(path, 'rb') as f:
+            magic = f.read(len(ARCHIVE_MAGIC))
+            if magic != ARCHIVE_MAGIC:
+                raise ValueError(f"{os.path.basename(path)} is not a Fluke 1529 archive")
+            (header_len,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_len).decode())
+        cache_put(archive_header_cache, path, (header['columns'], len(ARCHIVE_MAGIC) + 4 + header_len))
+    return archive_header_cache[path][0]
+
+def cache_put(cache, key, value):
+    """Stores a value in a per-file cache, dropping the least recently stored files beyond ARCHIVE_CACHE_FILES."""
+    cache.pop(key, None)
+    cache[key] = value
+    while len(cache) > ARCHIVE_CACHE_FILES:
+        cache.pop(next(iter(cache)))
+
+def archive_index(path):
+    """Returns the chunk index of an archive, reading only entries appended since the last call."""
+    columns = archive_columns(path)
+    dtype = archive_index_dtype(len(columns))
+    index_path = path + '.idx'
+    cached = archive_index_cache.get(path)
+    if cached is None:
+        cached = np.zeros(0, dtype=dtype)
+    if not os.path.exists(index_path):
+        return cached
+    with open(index_path, 'rb') as f:
+        f.seek(len(cached) * dtype.itemsize)
+        data = f.read()
+    n_new = len(data) // dtype.itemsize  # ignore a partially written trailing entry
+    if n_new:
+        cached = np.concatenate([cached, np.frombuffer(data[:n_new * dtype.itemsize], dtype=dtype)])
+        cache_put(archive_index_cache, path, cached)
+    return cached
+
+def archive_read_chunks(path, entries):
+    """Yields the given index entries of one archive decompressed, as (n_columns, rows) arrays, opening the file once."""
+    n_columns = len(archive_columns(path))
+    with open(path, 'rb') as f:
+        for offset, length, rows in zip(entries['offset'].tolist(), entries['length'].tolist(), entries['rows'].tolist()):
+            f.seek(offset)
+            yield np.frombuffer(zlib.decompress(f.read(length)), dtype='<f8').reshape(n_columns, rows)
+
+def archive_append(path, rows):
+    """Appends rows (one list per record, in ARCHIVE_COLUMNS order) to an archive as one compressed chunk."""
+    rows = np.asarray(rows, dtype='<f8')
+    if rows.size == 0:
+        return
+    if not os.path.exists(path):
+        header = json.dumps({'version': 1, 'columns': ARCHIVE_COLUMNS}).encode()
+        with open(path, 'wb') as f:
+            f.write(ARCHIVE_MAGIC + struct.pack('<I', len(header)) + header)
+        archive_header_cache.pop(path, None)
+        archive_index_cache.pop(path, None)
+    columns = archive_columns(path)
+    if rows.shape[1] != len(columns):
+        raise ValueError(f"Archive {os.path.basename(path)} has {len(columns)} columns, got {rows.shape[1]}")
+
+    rows = rows[np.argsort(rows[:, 0], kind='stable')]
+    block = np.ascontiguousarray(rows.T)
+    payload = zlib.compress(block.tobytes(), ARCHIVE_COMPRESSION_LEVEL)
+    with open(path, 'ab') as f:
+        offset = f.seek(0, os.SEEK_END)
+        f.write(payload)
+
+    entry = np.zeros(1, dtype=archive_index_dtype(len(columns)))
+    entry['offset'] = offset
+    entry['length'] = len(payload)
+    entry['rows'] = len(rows)
+    entry['t_min'] = block[0, 0]
+    entry['t_max'] = block[0, -1]
+    entry['col_min'] = np.fmin.reduce(block, axis=1)  # fmin/fmax skip NaN without warnings
+    entry['col_max'] = np.fmax.reduce(block, axis=1)
+    with open(path + '.idx', 'ab') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size % entry.itemsize:  # A torn earlier write; drop its partial entry so later ones stay aligned
+            f.truncate(size - size % entry.itemsize)
+            archive_index_cache.pop(path, None)
+        f.write(entry.tobytes())
+
+def archive_append_rows(save_dir, rows):
+    """Appends archive rows to the per-day archive files in save_dir, one chunk per day."""
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(from_epoch_seconds(row[0]).date(), []).append(row)
+    for day, day_rows in by_day.items():
+        archive_append(archive_path(save_dir, day), day_rows)
+
+def archive_files_for_range(start, end, save_dir):
+    """Lists the existing archive files covering the days between two epoch timestamps."""
+    day = from_epoch_seconds(start).date()
+    last_day = from_epoch_seconds(end).date()
+    paths = []
+    while day <= last_day:
+        path = archive_path(save_dir, day)
+        if os.path.exists(path):
+            paths.append(path)
+        day += timedelta(days=1)
+    return paths
+
+def archive_iter_chunks(start, end, columns, save_dir=None, paths=None):
+    """
+    Yields (len(columns), n) arrays, one per stored chunk overlapping start..end and trimmed
+    to it, in file and append order. Only one chunk is held in memory at a time.
+    """
+    start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+    if paths is None:
+        paths = archive_files_for_range(start, end, save_dir or SAVE_DIR)
+    for path in paths:
+        file_columns = archive_columns(path)
+        col_idx = [file_columns.index(c) for c in columns]
+        t_col = file_columns.index('timestamp')
+        index = archive_index(path)
+        for chunk in archive_read_chunks(path, index[(index['t_max'] >= start) & (index['t_min'] <= end)]):
+            t = chunk[t_col]
+            yield chunk[col_idx][:, (t >= start) & (t <= end)]
+
+def archive_read_range(start, end, columns=None, save_dir=None, paths=None):
+    """
+    Returns archived rows with start <= timestamp <= end as a (len(columns), n) array,
+    decompressing only the chunks whose time index overlaps the range.
+    Reads the given archive paths, or the per-day files in save_dir when paths is None.
+    """
+    columns = list(columns) if columns else list(ARCHIVE_COLUMNS)
+    if 'timestamp' not in columns:
+        columns = ['timestamp'] + columns
+    parts = list(archive_iter_chunks(start, end, columns, save_dir, paths))
+    if not parts:
+        return np.empty((len(columns), 0))
+    data = np.concatenate(parts, axis=1)
+    return data[:, np.argsort(data[columns.index('timestamp')], kind='stable')]
+
+def archive_index_tail(path, n_entries):
+    """Reads the last n_entries of an archive index by seeking from its end, without loading the rest."""
+    dtype = archive_index_dtype(len(archive_columns(path)))
+    index_path = path + '.idx'
+    if not os.path.exists(index_path):
+        return np.zeros(0, dtype=dtype)
+    with open(index_path, 'rb') as f:
+        total = f.seek(0, os.SEEK_END) // dtype.itemsize
+        count = min(n_entries, total)
+        f.seek((total - count) * dtype.itemsize)
+        return np.frombuffer(f.read(count * dtype.itemsize), dtype=dtype)
+
+def archive_tail(paths, n_rows):
+    """
+    Returns the last n_rows archived rows across paths (oldest file first) as a
+    (n_columns, n) array in ARCHIVE_COLUMNS order. Only the index tail and the last few
+    chunks are read, so the cost does not grow with file size.
+    """
+    parts, have = [], 0
+    for path in reversed(paths):
+        file_columns = archive_columns(path)
+        col_idx = [file_columns.index(c) for c in ARCHIVE_COLUMNS]
+        n_entries = 4
+        while True:
+            entries = archive_index_tail(path, n_entries)
+            if entries['rows'].sum() >= n_rows - have or len(entries) < n_entries:
+                break
+            n_entries *= 4
+        rows = 0
+        for i in range(len(entries) - 1, -1, -1):  # walk back only as far as needed
+            rows += int(entries[i]['rows'])
+            if rows >= n_rows - have:
+                entries = entries[i:]
+                break
+        chunks = [chunk[col_idx] for chunk in archive_read_chunks(path, entries)]
+        if chunks:
+            parts.insert(0, np.concatenate(chunks, axis=1))
+            have += parts[0].shape[1]
+        if have >= n_rows:
+            break
+    if not parts:
+        return np.empty((len(ARCHIVE_COLUMNS), 0))
+    data = np.concatenate(parts, axis=1)
+    data = data[:, np.argsort(data[0], kind='stable')]
+    return data[:, -n_rows:]
+
+def archive_decimated(paths, start, end, columns, n_buckets):
+    """
+    Returns (t, values) for plotting columns between start and end at about n_buckets points
+    of horizontal resolution. Ranges with more rows than buckets are reduced to a min/max pair
+    per bucket, and ranges spanning more than n_buckets // ARCHIVE_DECIMATE_CHUNKS_PER_BUCKET
+    chunks are drawn from the index statistics alone without decompressing anything.
+    """
+    start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+    n_buckets = max(int(n_buckets), 1)
+    hits = []
+    for path in paths:
+        index = archive_index(path)
+        hits.append((path, index[(index['t_max'] >= start) & (index['t_min'] <= end)]))
+
+    if sum(len(entries) for _, entries in hits) > n_buckets // ARCHIVE_DECIMATE_CHUNKS_PER_BUCKET:
+        t_parts, lo_parts, hi_parts = [], [], []
+        for path, entries in hits:
+            file_columns = archive_columns(path)
+            col_idx = [file_columns.index(c) for c in columns]
+            t_parts.append((entries['t_min'] + entries['t_max']) / 2)
+            lo_parts.append(entries['col_min'][:, col_idx].T)
+            hi_parts.append(entries['col_max'][:, col_idx].T)
+        t = np.concatenate(t_parts)
+        order = np.argsort(t, kind='stable')
+        t, lo, hi = t[order], np.concatenate(lo_parts, axis=1)[:, order], np.concatenate(hi_parts, axis=1)[:, order]
+    else:
+        data = archive_read_range(start, end, columns, paths=paths)
+        t, lo = data[0], data[1:]
+        if len(t) <= n_buckets:
+            return t, lo
+        hi = lo
+
+    bucket = np.clip(((t - start) / max(end - start, 1e-9) * n_buckets).astype(np.int64), 0, n_buckets - 1)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+    t_mid = (np.minimum.reduceat(t, starts) + np.maximum.reduceat(t, starts)) / 2
+    lo = np.fmin.reduceat(lo, starts, axis=1)
+    hi = np.fmax.reduceat(hi, starts, axis=1)
+    return np.repeat(t_mid, 2), np.stack([lo, hi], axis=2).reshape(len(columns), -1)
+
+def import_excel_to_archive(excel_file):
+    """Converts a daily Excel log into an archive next to it (once) and returns the archive path."""
+    path = os.path.splitext(excel_file)[0] + ARCHIVE_EXTENSION
+    if os.path.exists(path):
+        return path
+    df = pd.read_excel(excel_file)
+    timestamps = pd.to_datetime(df['Timestamp'])
+    rows = np.full((len(df), len(ARCHIVE_COLUMNS)), np.nan)
+    rows[:, 0] = (timestamps - pd.Timestamp(ARCHIVE_EPOCH)) / pd.Timedelta(seconds=1)
+    for i in range(1, 5):
+        for field in ARCHIVE_FIELDS:
+            name = f'Ch{i} {EXCEL_FIELD_LABELS[field]}'
+            if name in df.columns:
+                rows[:, ARCHIVE_COLUMNS.index(f'ch{i}_{field}')] = pd.to_numeric(df[name], errors='coerce')
+    for offset in range(0, len(rows), ARCHIVE_IMPORT_CHUNK_ROWS):
+        archive_append(path, rows[offset:offset + ARCHIVE_IMPORT_CHUNK_ROWS])
+    return path
+
+def export_archive_to_excel(start, end, excel_file, save_dir=None, rows_per_sheet=EXCEL_MAX_DATA_ROWS,
+                            sheets_per_file=EXPORT_SHEETS_PER_FILE, progress=None):
+    """
+    Streams archived records between start and end into xlsx workbooks in openpyxl write-only
+    mode, one chunk at a time, so memory stays flat however long the range is. A new sheet
+    is started every rows_per_sheet rows and a new file (excel_file with a _partN suffix)
+    every sheets_per_file sheets. Returns the list of files written.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+    save_dir = save_dir or SAVE_DIR
+    paths = archive_files_for_range(start, end, save_dir)
+
+    # Only export columns that hold data somewhere in the range (decided from the index alone)
+    columns = []
+    for name in ARCHIVE_COLUMNS[1:]:
+        for path in paths:
+            index = archive_index(path)
+            hits = index[(index['t_max'] >= start) & (index['t_min'] <= end)]
+            if np.isfinite(hits['col_max'][:, archive_columns(path).index(name)]).any():
+                columns.append(name)
+                break
+    headers = ['Timestamp'] + [f"Ch{name[2]} {EXCEL_FIELD_LABELS[name[4:]]}" for name in columns]
+    columns = ['timestamp'] + columns
+
+    base, ext = os.path.splitext(excel_file)
+    written = []
+    state = {'wb': None, 'ws': None, 'sheet_rows': 0, 'sheets': 0}
+
+    def new_sheet():
+        if state['wb'] is None or state['sheets'] == sheets_per_file:
+            if state['wb'] is not None:
+                state['wb'].save(written[-1])
+            state['wb'] = Workbook(write_only=True)
+            state['sheets'] = 0
+            written.append(excel_file if not written else f"{base}_part{len(written) + 1}{ext}")
+        state['sheets'] += 1
+        ws = state['wb'].create_sheet(title=f"Data {state['sheets']}")
+        # Column formats are set once per sheet; cell values carry no per-cell styles
+        ws.column_dimensions['A'].width = 20
+        for i in range(2, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(i)].width = 26
+        ws.freeze_panes = 'A2'
+        header_cells = []
+        for text in headers:
+            cell = WriteOnlyCell(ws, value=text)
+            cell.font = Font(bold=True)
+            header_cells.append(cell)
+        ws.append(header_cells)
+        state['ws'], state['sheet_rows'] = ws, 0
+
+    total = 0
+    new_sheet()
+    for chunk in archive_iter_chunks(start, end, columns, paths=paths):
+        block = chunk.T.astype(object)
+        block[np.isnan(chunk.T)] = None  # NaN is not valid in xlsx; leave the cell empty
+        block[:, 0] = pd.to_datetime(chunk[0], unit='s').to_pydatetime()
+        for row in block.tolist():
+            if state['sheet_rows'] == rows_per_sheet:
+                new_sheet()
+            state['ws'].append(row)
+            state['sheet_rows'] += 1
+        total += len(block)
+        if progress:
+            progress(total)
+    state['wb'].save(written[-1])
+    return written
+
+def query_archive(channel, start, end, fields=None, save_dir=None):
+    """
+    Returns one channel's archived fields between start and end as a DataFrame indexed by timestamp.
+    Example: query_archive(3, "2025-06-10 14:00", "2025-06-10 16:30", fields=['temp_chart'])
+    """
+    fields = list(fields) if fields else list(ARCHIVE_FIELDS)
+    data = archive_read_range(start, end, [f'ch{channel}_{field}' for field in fields], save_dir)
+    index = pd.DatetimeIndex(pd.to_datetime(data[0], unit='s'), name='Timestamp')
+    return pd.DataFrame(data[1:].T, index=index, columns=fields)
+
+# --- Sample Parsing & Transport ---
+# The serial thread parses and converts whole batches of lines into one structured block and
+# hands it to the GUI thread through a double buffer, so per-sample work is a few array
+# writes instead of a dict, a queue item and a lock round-trip.
+SAMPLE_DTYPE = np.dtype(
+    [('channel', 'u1'), ('timestamp', '<f8'), ('receive_time', '<f8')] +
+    [(field, '<f8') for field in ARCHIVE_FIELDS] +
+    [('cj_temp', '<f8'), ('temp', '<f8')]
+)
+
+class SampleTransport:
+    """
+    Double-buffered sample hand-over: one lock acquire per batch on each side. Buffers grow up
+    to max_samples; beyond that (the GUI thread has stalled) further samples spill to a
+    temporary file until take() has drained it, so arrival order is kept. If the spill file
+    cannot be written, the block is dropped and counted rather than raising into the producer.
+    """
+    __slots__ = ('lock', 'front', 'back', 'count', 'max_samples', 'spill', 'spilled', 'spill_pos', 'dropped')
+
+    def __init__(self, capacity=TRANSPORT_CAPACITY, max_samples=TRANSPORT_MAX_SAMPLES):
+        self.lock = threading.Lock()
+        self.front = np.empty(capacity, dtype=SAMPLE_DTYPE)
+        self.back = np.empty(capacity, dtype=SAMPLE_DTYPE)
+        self.count = 0
+        self.max_samples = max_samples
+        self.spill = None
+        self.spilled = 0
+        self.spill_pos = 0
+        self.dropped = 0
+
+    def put(self, block):
+        """
+        Appends a block of samples to the back buffer, growing it (up to max_samples) or spilling
+        if the consumer has fallen behind. Returns False if the block had to be dropped.
+        """
+        with self.lock:
+            end = self.count + len(block)
+            if self.spilled or end > self.max_samples:
+                try:
+                    self.spill_block(block)
+                except OSError as e:
+                    if not self.dropped:
+                        print(f"Sample transport could not spill to disk, dropping samples: {e}")
+                    self.dropped += len(block)
+                    return False
+                self.spilled += len(block)
+                return True
+            if end > len(self.back):
+                grown = np.empty(min(max(end, 2 * len(self.back)), self.max_samples), dtype=SAMPLE_DTYPE)
+                grown[:self.count] = self.back[:self.count]
+                self.back = grown
+            self.back[self.count:end] = block
+            self.count = end
+            return True
+
+    def spill_block(self, block):
+        """Writes a block after the spilled samples; a failed write is overwritten by the next one."""
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile(prefix="fluke_1529_transport_", buffering=0)
+        self.spill.seek(self.spill_pos + self.spilled * SAMPLE_DTYPE.itemsize)
+        data = memoryview(block.tobytes())
+        while data:
+            data = data[self.spill.write(data):]
+
+    def take(self):
+        """
+        Swaps buffers and returns every sample put since the last call; valid until the next take().
+        While samples are spilled, returns them in portions of up to max_samples, oldest first.
+        """
+        with self.lock:
+            if self.count or not self.spilled:
+                block = self.back[:self.count]
+                self.front, self.back = self.back, self.front
+                self.count = 0
+                return block
+            n = min(self.spilled, self.max_samples)
+            self.spill.seek(self.spill_pos)
+            block = np.frombuffer(self.spill.read(n * SAMPLE_DTYPE.itemsize), dtype=SAMPLE_DTYPE)
+            self.spilled -= n
+            self.spill_pos += n * SAMPLE_DTYPE.itemsize
+            if not self.spilled:
+                self.spill.seek(0)
+                self.spill.truncate()
+                self.spill_pos = 0
+            return block
+
+    def clear(self):
+        """Discards every sample, in the buffers and spilled."""
+        with self.lock:
+            self.count = 0
+            if self.spill is not None:
+                self.spill.seek(0)
+                self.spill.truncate()
+            self.spilled = self.spill_pos = 0
+
+    def __len__(self):
+        return self.count + self.spilled
+
+sample_transport = SampleTransport()
+
+def parse_instrument_timestamp(timestamp_str):
+    """Parses the instrument's date/time fields; returns None if no known format matches."""
+    for fmt in ('%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(timestamp_str, fmt)
+        except ValueError:
+            pass
+    try:
+        return parser.parse(timestamp_str)
+    except (ValueError, OverflowError) as e:
+        print(f"Failed to parse timestamp: {timestamp_str} — {e}")
+        return None
+
+def new_parse_state():
+    """Returns the per-connection state carried between parse_serial_lines calls."""
+    return {'latest_prt_temps': {}, 'cj_unavailable': set(), 'last_timestamp_str': None, 'last_timestamp': 0.0,
+            'errors': 0}
+
+def cold_junction_temperature(state, cj_channel, receive_time):
+    """
+    Returns the CJ channel's latest PRT temperature, or NaN if it is no longer a live PRT:
+    disabled, switched away from RES, or silent for longer than its own reporting interval
+    plus TIMESTAMP_TIMEOUT. Warns once each time a CJ channel becomes unavailable.
+    """
+    latest = state['latest_prt_temps']
+    entry = latest.get(cj_channel)
+    if entry is not None and (channel_configs[cj_channel]['type'] != 'RES' or not channel_enabled(cj_channel)):
+        del latest[cj_channel]
+        entry = None
+    if entry is not None:
+        temp, cj_time, interval = entry
+        if receive_time - cj_time <= (interval or 0.0) + TIMESTAMP_TIMEOUT:
+            state['cj_unavailable'].discard(cj_channel)
+            return temp
+    if cj_channel not in state['cj_unavailable']:
+        state['cj_unavailable'].add(cj_channel)
+        print(f"Cold junction Ch{cj_channel} has no current PRT reading; compensated thermocouple temperatures are NaN")
+    return np.nan
+
+def parse_serial_lines(lines, state):
+    """
+    Parses (line, receive_time) pairs from the instrument into a SAMPLE_DTYPE block and
+    converts the whole batch at once: ITS-90 for PRT channels and, per thermocouple type,
+    one forward (cold junction) and one inverse NIST polynomial pass plus the Type S Chart.
+    state carries live PRT temperatures for cold-junction compensation and the last parsed
+    timestamp (all channels of a reading share it, so it is parsed once).
+    """
+    channels, timestamps, received, raw_values = [], [], [], []
+    for line, receive_time in lines:
+        if VERBOSE_SERIAL_LOG:
+            print(f"Raw serial data: {line}")
+        line_parts = line.split()
+        if len(line_parts) < 5:
+            if line:
+                print(f"Invalid serial data format: {line}")
+            continue
+        try:
+            channel = int(line_parts[0])
+            if not channel_enabled(channel):
+                continue
+        except (ValueError, KeyError):
+            print(f"Error parsing serial data: invalid channel - Line: {line}")
+            state['errors'] += 1
+            continue
+        raw_val_str = line_parts[1]
+        if raw_val_str == '........':
+            continue
+        try:
+            raw_val = float(raw_val_str)
+        except ValueError:
+            print(f"Error parsing serial data: could not convert string to float: '{raw_val_str}' - Line: {line}")
+            state['errors'] += 1
+            continue
+        timestamp_str = f"{line_parts[4]} {line_parts[3]}"
+        if timestamp_str != state['last_timestamp_str']:
+            timestamp = parse_instrument_timestamp(timestamp_str)
+            if timestamp is None:
+                state['errors'] += 1
+                continue
+            state['last_timestamp_str'], state['last_timestamp'] = timestamp_str, to_epoch_seconds(timestamp)
+        channels.append(channel)
+        timestamps.append(state['last_timestamp'])
+        received.append(receive_time)
+        raw_values.append(raw_val)
+
+    n = len(channels)
+    block = np.empty(n, dtype=SAMPLE_DTYPE)
+    if not n:
+        return block
+    for field in ARCHIVE_FIELDS + ('cj_temp', 'temp'):
+        block[field] = np.nan
+    block['channel'] = channels
+    block['timestamp'] = timestamps
+    block['receive_time'] = received
+    raw = np.array(raw_values)
+    types = {ch: channel_configs[ch]['type'] for ch in set(channels)}
+    is_res = np.array([types[ch] == 'RES' for ch in channels])
+
+    temp_prt = its90_temperature_array(raw[is_res])
+    block['resistance'][is_res] = raw[is_res]
+    block['temp_prt'][is_res] = temp_prt
+
+    # Cold-junction temperatures follow the PRT readings in arrival order, across batches;
+    # each keeps its receive time and the gap since the previous one to judge staleness
+    latest = state['latest_prt_temps']
+    cj = np.full(n, np.nan)
+    compensate = np.zeros(n, dtype=bool)
+    res_temps = iter(temp_prt.tolist())
+    for i, ch in enumerate(channels):
+        if types[ch] == 'RES':
+            previous = latest.get(ch)
+            latest[ch] = (next(res_temps), received[i], received[i] - previous[1] if previous else None)
+        else:
+            cj_channel = channel_configs[ch].get('cj_channel')
+            if cj_channel:
+                compensate[i] = True
+                cj[i] = cold_junction_temperature(state, cj_channel, received[i])
+    block['cj_temp'] = np.where(compensate, cj, np.nan)
+
+    tc_types = np.array([channel_configs[ch]['tc_type'] if types[ch] != 'RES' else '' for ch in channels])
+    for tc_type in set(tc_types.tolist()) - {''}:
+        mask = tc_types == tc_type
+        emf = raw[mask]
+        emf_total = emf + np.where(compensate[mask], tc_temperature_to_emf(np.nan_to_num(cj[mask]), tc_type), 0.0)
+        emf_total[compensate[mask] & np.isnan(cj[mask])] = np.nan  # No current CJ reading
+        temp_nist = evaluate_tc_ranges(TC_TABLES[tc_type]['inverse'], emf_total)
+        block['emf'][mask] = emf
+        block['temp_nist'][mask] = temp_nist
+        if tc_type == 'S':
+            temp_chart = chart_emf_to_temperature(emf_total)
+            block['temp_chart'][mask] = temp_chart
+            block['difference'][mask] = temp_chart - temp_nist
+
+    block['temp'] = display_temperature(block['temp_prt'], block['temp_chart'], block['temp_nist'])
+    return block
+
+# --- Memory Budgets ---
+class SpillBuffer:
+    """
+    FIFO of archive rows holding at most max_rows in memory; older
+    rows spill to a temporary file as JSON lines. Rows are saved oldest first with peek() and
+    consume(), so a failing save keeps them for the next attempt without growing RAM.
+    """
+    __slots__ = ('name', 'max_rows', 'rows', 'decode', 'spill', 'spilled', 'spill_pos', 'peek_end')
+
+    def __init__(self, name, max_rows=SAVE_BUFFER_MAX_ROWS, decode=None):
+        self.name = name
+        self.max_rows = max_rows
+        self.rows = []
+        self.decode = decode or (lambda row: row)
+        self.spill = None
+        self.spilled = 0
+        self.spill_pos = 0
+        self.peek_end = 0
+
+    def append(self, row):
+        self.rows.append(row)
+        if len(self.rows) > self.max_rows:
+            # Spill the older half at once so the file is written in large, infrequent blocks
+            n = len(self.rows) // 2
+            if self.spill is None:
+                self.spill = tempfile.TemporaryFile(prefix=f"fluke_1529_{self.name}_")
+            self.spill.seek(0, os.SEEK_END)
+            self.spill.write(b''.join(json.dumps(r.tolist() if isinstance(r, np.ndarray) else r).encode() + b'\n'
+                                      for r in self.rows[:n]))
+            del self.rows[:n]
+            self.spilled += n
+
+    def peek(self, n):
+        """Returns up to n of the oldest rows without removing them (spilled rows first)."""
+        if not self.spilled:
+            return self.rows[:n]
+        self.spill.seek(self.spill_pos)
+        rows = [self.decode(json.loads(self.spill.readline())) for _ in range(min(n, self.spilled))]
+        self.peek_end = self.spill.tell()
+        return rows
+
+    def consume(self, n):
+        """Drops the n oldest rows, as returned by the last peek()."""
+        if not self.spilled:
+            del self.rows[:n]
+            return
+        self.spilled -= n
+        self.spill_pos = self.peek_end
+        if not self.spilled:
+            self.spill.seek(0)
+            self.spill.truncate()
+            self.spill_pos = 0
+
+    def clear(self):
+        self.rows.clear()
+        if self.spill is not None:
+            self.spill.seek(0)
+            self.spill.truncate()
+        self.spilled = self.spill_pos = 0
+
+    def spilled_bytes(self):
+        """Returns the size of the spilled rows still waiting in the spill file."""
+        if self.spill is None:
+            return 0
+        return self.spill.seek(0, os.SEEK_END) - self.spill_pos
+
+    def __len__(self):
+        return self.spilled + len(self.rows)
+
+new_records_buffer = SpillBuffer('excel_records', decode=lambda row: np.array(row, dtype=float))
+archive_rows_buffer = SpillBuffer('archive_rows', decode=lambda row: np.array(row, dtype=float))
+
+def save_pending(buffer, save, batch_rows=SAVE_BATCH_ROWS, max_batches=None):
+    """
+    Saves a SpillBuffer oldest first, batch_rows at a time, with save(rows) -> bool, until it
+    is empty or max_batches batches have been saved. Stops at the first failure and keeps the
+    unsaved rows. Returns False if a save failed.
+    """
+    batches = 0
+    while len(buffer) and (max_batches is None or batches < max_batches):
+        rows = buffer.peek(batch_rows)
+        if not save(rows):
+            return False
+        buffer.consume(len(rows))
+        batches += 1
+    return True
+
+def process_rss_bytes():
+    """Returns the process's resident set size in bytes, or None where it cannot be read."""
+    try:
+        if sys.platform.startswith('linux'):
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        elif sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+def memory_report():
+    """
+    Returns (structure, items, budget, approx. bytes in memory, bytes spilled to disk) for every
+    bounded structure of the acquisition pipeline; sizes are estimates from representative items.
+    """
+    report = []
+    transport_label = f"Sample transport ({sample_transport.dropped} dropped)" if sample_transport.dropped else "Sample transport"
+    report.append((transport_label, len(sample_transport), TRANSPORT_MAX_SAMPLES,
+                   sample_transport.front.nbytes + sample_transport.back.nbytes,
+                   sample_transport.spilled * SAMPLE_DTYPE.itemsize))
+    record_bytes = 0
+    if current_record:
+        record_data = next(iter(current_record.values()))
+        record_bytes = sys.getsizeof(record_data) + sys.getsizeof(record_data['row']) + sys.getsizeof(record_data['channels'])
+    report.append(("Pending records", len(current_record), PENDING_RECORDS_MAX, record_bytes * len(current_record), 0))
+    for label, buffer in (("Excel records", new_records_buffer), ("Archive rows", archive_rows_buffer)):
+        row_bytes = sys.getsizeof(buffer.rows[0]) if buffer.rows else 0
+        report.append((label, len(buffer), SAVE_BUFFER_MAX_ROWS, row_bytes * len(buffer.rows), buffer.spilled_bytes()))
+    plot_points = len(plot_timestamps) + sum(len(series) for fields in plot_data.values() for series in fields.values())
+    report.append(("Plot buffers", plot_points, PLOT_MAX_POINTS * (1 + 5 * len(plot_data)), plot_points * 32, 0))
+    report.append(("Archive index cache", len(archive_index_cache), ARCHIVE_CACHE_FILES,
+                   sum(index.nbytes for index in archive_index_cache.values()), 0))
+    return report
+
+# --- Record Assembly ---
+# Samples sharing an instrument timestamp are collected into one archive row until every enabled
+# channel has reported or TIMESTAMP_TIMEOUT lapses. Clocks are the monotonic receive times stamped
+# by the serial thread, so a replayed capture assembles exactly the records the live run did.
+def add_samples_to_records(block):
+    """Writes a block of samples into current_record; returns the (n, 6) view of their stored fields."""
+    # One (n, 6) float view of the stored fields, written into each record's row as a slice
+    values = structured_to_unstructured(block[list(ARCHIVE_FIELDS)])
+    n_fields = len(ARCHIVE_FIELDS)
+    for i, (channel, epoch, receive_time) in enumerate(zip(block['channel'].tolist(), block['timestamp'].tolist(),
+                                                           block['receive_time'].tolist())):
+        # Initialize current_record for this timestamp if not present
+        record_data = current_record.get(epoch)
+        if record_data is None:
+            row = np.full(len(ARCHIVE_COLUMNS), np.nan)
+            row[0] = epoch
+            record_data = current_record[epoch] = {'row': row, 'channels': set(), 'receive_time': receive_time}
+        base = 1 + (channel - 1) * n_fields
+        record_data['row'][base:base + n_fields] = values[i]
+        record_data['channels'].add(channel)
+    return values
+
+def assembly_clock(now, last_taken):
+    """
+    Returns the time to judge record timeouts by. While the transport still holds a backlog
+    this is last_taken, the receive time of the newest sample taken from it, so records split
+    across two portions of a drained backlog are not flushed partial.
+    """
+    if last_taken is not None and len(sample_transport):
+        return last_taken
+    return now
+
+def assemble_records(current_time):
+    """
+    Moves complete or timed-out entries of current_record into the save buffers.
+    current_time is on the serial thread's monotonic clock. Returns the number of records
+    flushed incomplete by the timeout or the PENDING_RECORDS_MAX cap.
+    """
+    # Check for complete or timed-out records
+    enabled_channels = [ch for ch in range(1, 5) if channel_enabled(ch)]
+    partial = 0
+    # Beyond PENDING_RECORDS_MAX the oldest timestamps are saved as they are, however recent
+    overflow = len(current_record) - PENDING_RECORDS_MAX
+    for timestamp_key in list(current_record.keys()):
+        record_data = current_record[timestamp_key]
+        received_channels = record_data['channels']
+        complete = all(ch in received_channels for ch in enabled_channels)
+        overflow -= 1
+        if complete or overflow >= 0 or (current_time - record_data['receive_time'] >= TIMESTAMP_TIMEOUT):
+            # The same fixed-layout row goes to the Excel log and the archive
+            new_records_buffer.append(record_data['row'])
+            archive_rows_buffer.append(record_data['row'])
+            update_calibration(record_data['row'])
+            if VERBOSE_SERIAL_LOG:
+                print(f"Processed record for timestamp {from_epoch_seconds(timestamp_key)}: {record_data['row']}")
+            del current_record[timestamp_key]
+            partial += not complete
+    return partial
+
+def excel_log_frame(rows):
+    """
+    Builds the Excel log DataFrame for a batch of archive rows. Each channel gets the PRT and/or
+    thermocouple columns that hold data in the batch (its current type's if none do), so rows
+    assembled before and after a unit change fit one layout.
+    """
+    data = np.array(rows, dtype=float).reshape(-1, len(ARCHIVE_COLUMNS))
+    frame = {'Timestamp': [from_epoch_seconds(t).strftime("%Y-%m-%d %H:%M:%S") for t in data[:, 0].tolist()]}
+    for ch in range(1, 5):
+        types = [sensor for sensor, raw_field in (('RES', 'resistance'), ('TC', 'emf'))
+                 if np.isfinite(data[:, ARCHIVE_COLUMNS.index(f'ch{ch}_{raw_field}')]).any()]
+        for sensor in types or [channel_configs[ch]['type']]:
+            for field in EXCEL_TYPE_FIELDS[sensor]:
+                frame[f'Ch{ch} {EXCEL_FIELD_LABELS[field]}'] = data[:, ARCHIVE_COLUMNS.index(f'ch{ch}_{field}')]
+    return pd.DataFrame(frame)
+
+# --- Comparison Calibration ---
+# Channels can be given reference/DUT roles. Every assembled record adds each DUT's reading and
+# its deviation from the reference (DUT - reference) to that DUT's running normal-equation sums
+# (X'X, X'y, y'y), so the deviation polynomial can be re-solved at any moment without re-reading
+# the log. Readings are scaled by CALIBRATION_TEMP_SCALE to keep the sums well conditioned.
+# Only records from stable stretches enter the sums: the same trailing-window test as the report's
+# plateaus, applied to both the reference and the DUT, so ramps (where the two lag each other)
+# neither bias the fit nor count as setpoints.
+CALIBRATION_DEGREE = 2
+CALIBRATION_MAX_DEGREE = 3
+CALIBRATION_TEMP_SCALE = 1000.0
+CALIBRATION_SETPOINT_BAND = 5.0     # °C; readings are grouped into bands of this width to count setpoints
+CALIBRATION_SETPOINT_MIN_RECORDS = 30  # Stable records a band needs before it counts as a setpoint
+CALIBRATION_STABLE_SECONDS = 300    # Trailing window that must be stable, as REPORT_WINDOW_SECONDS
+CALIBRATION_STABLE_RANGE = 0.05     # °C; largest max - min of reference and DUT within it, as REPORT_STABLE_RANGE
+CALIBRATION_STABLE_MIN_RECORDS = 10 # Fewest records a stable window must hold, as REPORT_MIN_POINTS
+CALIBRATION_MAX_CONDITION = 1e10
+
+calibration_state = {'reference': None, 'degree': CALIBRATION_DEGREE, 'sums': {}, 'latest': {}}
+
+def row_temperature(row, channel):
+    """Returns a channel's displayed temperature from an archive row."""
+    base = 1 + (channel - 1) * len(ARCHIVE_FIELDS)
+    return float(display_temperature(row[base + 1], row[base + 4], row[base + 3]))
+
+def set_calibration_roles(reference, duts, degree=CALIBRATION_DEGREE):
+    """Assigns the reference and DUT channels and starts a new fit; reference None turns the mode off."""
+    if reference is not None and reference in duts:
+        raise ValueError(f"Channel {reference} cannot be both reference and DUT")
+    if not 0 <= degree <= CALIBRATION_MAX_DEGREE:
+        raise ValueError(f"Fit degree must be 0-{CALIBRATION_MAX_DEGREE}")
+    calibration_state.update({'reference': reference, 'degree': degree, 'latest': {}})
+    calibration_state['sums'] = {dut: new_calibration_sums(degree) for dut in sorted(duts)} if reference else {}
+
+def new_calibration_sums(degree):
+    """Returns empty running sums for a deviation polynomial of the given degree."""
+    p = degree + 1
+    return {'xtx': np.zeros((p, p)), 'xty': np.zeros(p), 'yty': 0.0, 'n': 0,
+            'exponents': np.arange(p), 'bands': {}, 'window': deque(), 'series_start': None, 'unstable': 0}
+
+def reset_calibration():
+    """Clears the running sums, keeping the channel roles (e.g. for a new calibration run)."""
+    set_calibration_roles(calibration_state['reference'], list(calibration_state['sums']), calibration_state['degree'])
+
+def update_calibration(row):
+    """
+    Queues one assembled record's reference and DUT readings in each DUT's trailing window.
+    Whenever the window is stable, its records not yet counted are added to the running sums;
+    records that leave the window without ever being part of a stable one are only counted.
+    """
+    reference = calibration_state['reference']
+    if reference is None:
+        return
+    t_ref = row_temperature(row, reference)
+    if t_ref != t_ref:
+        return
+    timestamp = float(row[0])
+    for dut, sums in calibration_state['sums'].items():
+        t_dut = row_temperature(row, dut)
+        if t_dut != t_dut:
+            continue
+        calibration_state['latest'][dut] = {'timestamp': timestamp, 'reference': t_ref,
+                                            'reading': t_dut, 'deviation': t_dut - t_ref}
+        window = sums['window']
+        if window and timestamp - window[-1][0] >= CALIBRATION_STABLE_SECONDS:
+            sums['unstable'] += sum(1 for entry in window if not entry[3])  # A gap restarts the window
+            window.clear()
+        if not window:
+            sums['series_start'] = timestamp
+        window.append([timestamp, t_ref, t_dut, False])
+        while timestamp - window[0][0] >= CALIBRATION_STABLE_SECONDS:  # Windows are (t - window, t]
+            sums['unstable'] += not window.popleft()[3]
+        if timestamp - sums['series_start'] < CALIBRATION_STABLE_SECONDS or len(window) < CALIBRATION_STABLE_MIN_RECORDS:
+            continue
+        refs = [entry[1] for entry in window]
+        readings = [entry[2] for entry in window]
+        if max(refs) - min(refs) > CALIBRATION_STABLE_RANGE or max(readings) - min(readings) > CALIBRATION_STABLE_RANGE:
+            continue
+        for entry in window:
+            if not entry[3]:
+                entry[3] = True
+                add_calibration_point(sums, entry[1], entry[2])
+
+def add_calibration_point(sums, t_ref, t_dut):
+    """Adds one stable DUT - reference deviation to a DUT's normal-equation sums and setpoint bands."""
+    deviation = t_dut - t_ref
+    powers = (t_dut / CALIBRATION_TEMP_SCALE) ** sums['exponents']
+    sums['xtx'] += np.outer(powers, powers)
+    sums['xty'] += powers * deviation
+    sums['yty'] += deviation * deviation
+    sums['n'] += 1
+    band = round(t_dut / CALIBRATION_SETPOINT_BAND)
+    sums['bands'][band] = sums['bands'].get(band, 0) + 1
+
+def solve_calibration(dut):
+    """
+    Solves a DUT's deviation polynomial from its running sums. The degree drops below the
+    requested one until it is supported by enough setpoints and the system is well conditioned.
+    Returns None before the first stable record, else a dict with coefficients (°C per °C^k, lowest
+    power first), the degree used, n, setpoints and the residual standard deviation (None
+    while there are no degrees of freedom).
+    """
+    sums = calibration_state['sums'].get(dut)
+    if not sums or not sums['n']:
+        return None
+    setpoints = sum(1 for count in sums['bands'].values() if count >= CALIBRATION_SETPOINT_MIN_RECORDS)
+    for degree in range(min(calibration_state['degree'], max(setpoints - 1, 0)), -1, -1):
+        p = degree + 1
+        xtx = sums['xtx'][:p, :p]
+        if sums['n'] >= p and np.linalg.cond(xtx) < CALIBRATION_MAX_CONDITION:
+            coefficients = np.linalg.solve(xtx, sums['xty'][:p])
+            break
+    else:
+        return None
+    xty = sums['xty'][:p]
+    rss = max(sums['yty'] - 2 * coefficients @ xty + coefficients @ xtx @ coefficients, 0.0)
+    dof = sums['n'] - p
+    return {'degree': degree, 'n': sums['n'], 'setpoints': setpoints,
+            'coefficients': (coefficients / CALIBRATION_TEMP_SCALE ** np.arange(p)).tolist(),
+            'residual_std': math.sqrt(rss / dof) if dof > 0 else None}
+
+def calibration_deviation(fit, reading):
+    """Evaluates a solved deviation polynomial at a DUT reading; the corrected reading is reading - deviation."""
+    return float(np.polynomial.polynomial.polyval(reading, fit['coefficients']))
+
+def calibration_report():
+    """Returns the channel roles and every DUT's current fit as a JSON-serializable dict."""
+    return {'reference': calibration_state['reference'], 'requested_degree': calibration_state['degree'],
+            'model': 'deviation = sum(c[k] * reading**k); corrected = reading - deviation',
+            'duts': {str(dut): {'fit': solve_calibration(dut), 'latest': calibration_state['latest'].get(dut),
+                                'excluded_unstable': sums['unstable']}
+                     for dut, sums in calibration_state['sums'].items()}}
+
+# --- Serial Capture & Replay ---
+# A capture file is CAPTURE_MAGIC, a JSON header, then one record per event: host monotonic
+# time, kind and payload length (CAPTURE_RECORD) followed by the payload. Lines are stored as the
+# raw bytes read from the port; configuration changes as JSON so replay converts with the same
+# channel types and cold-junction sources the live run used.
+CAPTURE_MAGIC = b'F1529CAP'
+CAPTURE_EXTENSION = '.f1529cap'
+CAPTURE_RECORD = struct.Struct('<dBH')
+CAPTURE_LINE, CAPTURE_CONFIG, CAPTURE_COMMAND = 0, 1, 2
+REPLAY_PROGRESS_LINES = 10000  # Lines between progress callbacks during replay
+
+def channel_config_snapshot():
+    """Returns the conversion-relevant channel settings as a JSON-serializable dict."""
+    return {str(ch): {'type': cfg['type'], 'unit': cfg['unit'], 'tc_type': cfg['tc_type'],
+                      'cj_channel': cfg['cj_channel'], 'enabled': bool(channel_enabled(ch))}
+            for ch, cfg in channel_configs.items()}
+
+def apply_channel_config_snapshot(snapshot):
+    """Applies a snapshot from channel_config_snapshot(); 'enabled' becomes a plain bool."""
+    for ch, cfg in snapshot.items():
+        channel_configs[int(ch)].update(cfg)
+
+class SerialCapture:
+    """Writes every raw line, sent command and channel configuration change of a session to a capture file."""
+    __slots__ = ('file', 'config')
+
+    def __init__(self, path):
+        self.config = channel_config_snapshot()
+        header = json.dumps({'version': 1, 'started': datetime.now().isoformat(timespec='seconds'),
+                             'channels': self.config}).encode()
+        self.file = open(path, 'wb')
+        self.file.write(CAPTURE_MAGIC + struct.pack('<I', len(header)) + header)
+
+    def write(self, kind, payload, t=None):
+        """Appends one event; payload is bytes (a raw line) or str."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self.file.write(CAPTURE_RECORD.pack(time.monotonic() if t is None else t, kind, len(payload)) + payload)
+
+    def check_config(self):
+        """Records the channel configuration if it changed since the last check."""
+        config = channel_config_snapshot()
+        if config != self.config:
+            self.config = config
+            self.write(CAPTURE_CONFIG, json.dumps(config))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def stop_capture(capture, error):
+    """Closes a capture whose file could not be written and returns the message to report; logging continues without it."""
+    message = f"Serial capture stopped, file write failed: {error}"
+    print(message)
+    try:
+        capture.close()
+    except OSError:
+        pass
+    return message
+
+def capture_path(save_dir, started):
+    """Returns the capture file path for a session started at the given datetime."""
+    return os.path.join(save_dir, f"fluke_1529_{started:%Y%m%d_%H%M%S}{CAPTURE_EXTENSION}")
+
+def read_capture(path):
+    """Returns (header, events) for a capture file; events yields (monotonic time, kind, payload bytes)."""
+    f = open(path, 'rb')
+    if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+        f.close()
+        raise ValueError(f"{os.path.basename(path)} is not a serial capture file")
+    (header_len,) = struct.unpack('<I', f.read(4))
+    header = json.loads(f.read(header_len))
+
+    def events():
+        with f:
+            while True:
+                head = f.read(CAPTURE_RECORD.size)
+                if len(head) < CAPTURE_RECORD.size:
+                    return  # End of file, or a record cut short when the session was killed
+                t, kind, length = CAPTURE_RECORD.unpack(head)
+                payload = f.read(length)
+                if len(payload) < length:
+                    return
+                yield t, kind, payload
+    return header, events()
+
+def replay_capture(capture_file, save_dir, speed=1.0, progress=None):
+    """
+    Feeds a capture through parsing, conversion, record assembly and archive persistence
+    without a GUI, paced at speed x real time (0 = as fast as possible). See replay_events().
+    """
+    header, events = read_capture(capture_file)
+    return replay_events(header['channels'], events, save_dir, speed, progress)
+
+def replay_events(channels, events, save_dir, speed=0, progress=None, save=None, save_excel=None, stalled=None):
+    """
+    Runs (monotonic time, kind, payload) events through the acquisition pipeline, starting from
+    a channel_config_snapshot(). Lines are batched per INGEST_POLL_MS of capture time, parsed and
+    handed over through sample_transport, and taken one portion per batch, as the GUI thread
+    would. Archive rows are saved every SAVE_INTERVAL_RECORDS records with save(rows) -> bool
+    (default: append to the archives in save_dir) and Excel records with save_excel(rows) -> bool
+    (default: discarded; export from the archive instead). After a failure, saving is retried
+    SAVE_RETRY_SECONDS of capture time later while rows wait in their buffers. While stalled(t)
+    is true the consumer side does nothing, like a blocked GUI thread, and samples queue up in
+    the transport. Returns counters plus the processing time, which excludes pacing sleeps.
+    """
+    if save is None:
+        def save(rows):
+            try:
+                archive_append_rows(save_dir, rows)
+                return True
+            except OSError as e:
+                print(f"Archive save failed: {e}")
+                return False
+    saved_configs = {ch: dict(cfg) for ch, cfg in channel_configs.items()}
+    apply_channel_config_snapshot(channels)
+    current_record.clear()
+    new_records_buffer.clear()
+    archive_rows_buffer.clear()
+    sample_transport.clear()
+    parse_state = new_parse_state()
+    stats = {'lines': 0, 'samples': 0, 'records': 0, 'partial': 0, 'commands': 0, 'config_changes': 0,
+             'errors': 0, 'save_failures': 0, 'unsaved': 0, 'dropped': 0, 'time': 0.0, 'busy_seconds': 0.0,
+             'elapsed_seconds': 0.0}
+    poll = INGEST_POLL_MS / 1000
+    wall_start = time.perf_counter()
+    first_t = None
+    retry_at = -float('inf')
+    batch = []
+    last_taken = None
+    dropped_before = sample_transport.dropped
+
+    def ingest():
+        nonlocal last_taken
+        block = sample_transport.take()
+        if len(block):
+            add_samples_to_records(block)
+            stats['samples'] += len(block)
+            last_taken = float(block['receive_time'][-1])
+
+    def process(batch):
+        if speed:
+            delay = (batch[-1][1] - first_t) / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+        started = time.perf_counter()
+        running = not (stalled and stalled(batch[-1][1]))
+        if running:
+            stats['partial'] += assemble_records(assembly_clock(batch[0][1], last_taken))  # Ticks in the gap before this batch
+        block = parse_serial_lines(batch, parse_state)
+        if len(block):
+            sample_transport.put(block)
+        if running:
+            ingest()
+            stats['partial'] += assemble_records(assembly_clock(batch[-1][1], last_taken))
+            save_rows(batch[-1][1])
+        stats['busy_seconds'] += time.perf_counter() - started
+
+    def save_rows(now, force=False):
+        nonlocal retry_at
+        if save_excel is None:
+            new_records_buffer.clear()
+        pending = max(len(new_records_buffer), len(archive_rows_buffer))
+        if pending and (force or (pending >= SAVE_INTERVAL_RECORDS and now >= retry_at)):
+            archived = len(archive_rows_buffer)
+            batches = None if force else 1  # As the GUI: one batch per tick, a full drain at the end
+            saved = save_excel is None or save_pending(new_records_buffer, save_excel, max_batches=batches)
+            if save_pending(archive_rows_buffer, save, max_batches=batches) and saved:
+                retry_at = -float('inf')
+            else:
+                stats['save_failures'] += 1
+                retry_at = now + SAVE_RETRY_SECONDS
+            stats['records'] += archived - len(archive_rows_buffer)
+
+    try:
+        for t, kind, payload in events:
+            if first_t is None:
+                first_t = t
+            if batch and (kind != CAPTURE_LINE or t - batch[0][1] >= poll or len(batch) >= TRANSPORT_BATCH_MAX):
+                process(batch)
+                batch = []
+            if kind == CAPTURE_LINE:
+                batch.append((payload.decode(errors='ignore').strip(), t))
+                stats['lines'] += 1
+                if progress and stats['lines'] % REPLAY_PROGRESS_LINES == 0:
+                    stats['time'] = t - first_t
+                    progress(stats)
+            elif kind == CAPTURE_CONFIG:
+                apply_channel_config_snapshot(json.loads(payload))
+                stats['config_changes'] += 1
+            elif kind == CAPTURE_COMMAND:
+                stats['commands'] += 1
+                if VERBOSE_SERIAL_LOG:
+                    print(f"Command sent: {payload.decode(errors='ignore')}")
+        if batch:
+            process(batch)
+        started = time.perf_counter()
+        while len(sample_transport):
+            ingest()
+            stats['partial'] += assemble_records(assembly_clock(float('inf'), last_taken))
+        stats['partial'] += assemble_records(float('inf'))  # End of capture: flush what is left
+        save_rows(float('inf'), force=True)
+        stats['busy_seconds'] += time.perf_counter() - started
+    finally:
+        for ch, cfg in saved_configs.items():
+            channel_configs[ch].update(cfg)
+    stats['errors'] = parse_state['errors']
+    stats['unsaved'] = max(len(new_records_buffer), len(archive_rows_buffer))
+    stats['dropped'] = sample_transport.dropped - dropped_before
+    stats['elapsed_seconds'] = time.perf_counter() - wall_start
+    return stats
+
+# --- Soak Test ---
+SOAK_START = datetime(2000, 1, 1)  # Simulated runs start here, well away from real logs
+SOAK_DROPOUT_SECONDS = 600         # Channel 4 is silent for this long at the start of each simulated day
+
+def soak_events(days, period, clock):
+    """
+    Yields synthetic capture events: all four channels every `period` seconds for `days` days,
+    with channel 4 silent for SOAK_DROPOUT_SECONDS each day so records time out partial.
+    clock['t'] follows the simulated monotonic time.
+    """
+    n_readings = int(days * 86400 / period)
+    for k in range(n_readings):
+        t = k * period
+        clock['t'] = t
+        stamp = (SOAK_START + timedelta(seconds=t)).strftime("%H:%M:%S %d/%m/%Y")
+        drift = math.sin(k * 1e-4)
+        dropout = t % 86400 < SOAK_DROPOUT_SECONDS
+        yield t, CAPTURE_LINE, f"1 {138.5 + drift:.4f} O {stamp}".encode()
+        yield t + 0.01, CAPTURE_LINE, f"2 {100.0 + drift:.4f} O {stamp}".encode()
+        yield t + 0.02, CAPTURE_LINE, f"3 {9.5 + drift:.4f} MV {stamp}".encode()
+        if not dropout:
+            yield t + 0.03, CAPTURE_LINE, f"4 {10.0 + drift:.4f} MV {stamp}".encode()
+
+def run_soak_test(days, period, save_dir, outage_hours=0.0, stall_hours=0.0, report_hours=24.0, report=None):
+    """
+    Feeds `days` of synthetic input through the replay pipeline as fast as possible and samples
+    the process RSS and memory_report() every REPLAY_PROGRESS_LINES lines. Starting one simulated
+    day in, archive and Excel saves fail for outage_hours, so both save buffers have to spill,
+    and the consumer stalls for stall_hours, so samples pile up in the transport. Excel batches
+    are built into the log's DataFrame and discarded rather than written.
+    report(stats, rss, memory) is called every report_hours of simulated time.
+    Returns (stats, [(simulated seconds, rss bytes), ...]).
+    """
+    clock = {'t': 0.0}
+    outage = (86400.0, 86400.0 + outage_hours * 3600)
+    stall = (86400.0, 86400.0 + stall_hours * 3600)
+    samples = []
+    next_report = 0.0
+
+    def save(rows):
+        if outage[0] <= clock['t'] < outage[1]:
+            return False
+        archive_append_rows(save_dir, rows)
+        return True
+
+    def save_excel(rows):
+        if outage[0] <= clock['t'] < outage[1]:
+            return False
+        excel_log_frame(rows)
+        return True
+
+    def progress(stats):
+        nonlocal next_report
+        samples.append((stats['time'], process_rss_bytes()))
+        if report and stats['time'] >= next_report:
+            next_report += report_hours * 3600
+            report(stats, samples[-1][1], memory_report())
+
+    channels = {str(ch): {'type': 'RES' if ch <= 2 else 'TC', 'unit': 'O' if ch <= 2 else 'MV', 'tc_type': 'S',
+                          'cj_channel': None, 'enabled': True} for ch in range(1, 5)}
+    stats = replay_events(channels, soak_events(days, period, clock), save_dir, speed=0, progress=progress, save=save,
+                          save_excel=save_excel, stalled=lambda t: stall[0] <= t < stall[1])
+    return stats, samples
+
+# --- Calibration Report ---
+# The report command finds stable plateaus (setpoints) in each channel's temperature and
+# summarizes them. Work fans out over a process pool, one task per (day file, channel); each task
+# reads only its file's chunks and does plateau detection and statistics as vectorized passes.
+# A plateau that crosses midnight is therefore reported as two rows, one per day file.
+# Task functions live above the GUI section so spawned worker processes can import them.
+REPORT_WINDOW_SECONDS = 300  # Length of the trailing window that must be stable
+REPORT_STABLE_RANGE = 0.05   # °C; largest max - min allowed within a stable window
+REPORT_MIN_POINTS = 10       # Fewest samples a stable window (and a plateau) must hold
+REPORT_HEADERS = [
+    ('Start', 20), ('End', 20), ('Duration (min)', 14), ('Samples', 10), ('Sensor', 8),
+    ('Mean (°C)', 12), ('Std (°C)', 10), ('Min (°C)', 12), ('Max (°C)', 12), ('Drift (°C/h)', 12),
+    ('Mean Raw (Ω / mV)', 16), ('NIST Mean (°C)', 14), ('Chart Mean (°C)', 14),
+    ('Chart - NIST Mean (°C)', 20), ('Chart - NIST Std (°C)', 19), ('Chart - NIST Max |Δ| (°C)', 22), ('Source', 26),
+]
+
+def find_plateaus(t, temp, window=REPORT_WINDOW_SECONDS, tolerance=REPORT_STABLE_RANGE, min_points=REPORT_MIN_POINTS):
+    """
+    Returns (start, stop) index pairs of stable plateaus in a sorted series. Every trailing
+    window of `window` seconds with at least min_points samples spanning at most `tolerance`
+    marks its samples as stable; plateaus are the runs of stable samples, split at gaps
+    longer than the window. A slow drift keeps every window stable, so a run whose overall
+    max - min exceeds `tolerance` is split where it does, and split pieces spanning less than
+    one window are dropped.
+    """
+    if len(t) < min_points:
+        return []
+    series = pd.Series(temp, index=pd.to_datetime(t, unit='s'))
+    rolling = series.rolling(f'{window}s')
+    stable = ((rolling.max() - rolling.min() <= tolerance) & (rolling.count() >= min_points)).to_numpy()
+    ends = np.flatnonzero(stable)
+    starts = np.searchsorted(t, t[ends] - window, side='right')  # Rolling windows are (t - window, t]
+    cover = np.zeros(len(t) + 1, dtype=np.int64)
+    np.add.at(cover, starts, 1)
+    np.add.at(cover, ends + 1, -1)
+    covered = (np.cumsum(cover[:-1]) > 0).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], covered, [0])))
+    plateaus = []
+    for a, b in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        cuts = a + 1 + np.flatnonzero(np.diff(t[a:b]) > window)
+        for lo, hi in zip(np.concatenate(([a], cuts)), np.concatenate((cuts, [b]))):
+            plateaus.extend(split_plateau(t, temp, int(lo), int(hi), window, tolerance, min_points))
+    return plateaus
+
+def split_plateau(t, temp, lo, hi, window, tolerance, min_points):
+    """
+    Splits the stable run temp[lo:hi] into consecutive pieces whose max - min is at most
+    `tolerance`. A run already within it is returned whole; pieces of a split run are kept if
+    they hold min_points samples over at least one window.
+    """
+    pieces = []
+    split = False
+    while hi - lo >= min_points:
+        segment = temp[lo:hi]
+        spread = np.maximum.accumulate(segment) - np.minimum.accumulate(segment)
+        over = np.flatnonzero(spread > tolerance)
+        end = lo + int(over[0]) if len(over) else hi
+        split = split or end < hi
+        if end - lo >= min_points and (not split or t[end - 1] - t[lo] >= window):
+            pieces.append((lo, end))
+        lo = end
+    return pieces
+
+def report_channel_plateaus(path, channel, start, end, window=REPORT_WINDOW_SECONDS,
+                            tolerance=REPORT_STABLE_RANGE, min_points=REPORT_MIN_POINTS):
+    """Process pool task: finds and summarizes one channel's plateaus in one archive file. Returns a list of row dicts."""
+    columns = [f'ch{channel}_{field}' for field in ARCHIVE_FIELDS]
+    data = archive_read_range(start, end, columns, paths=[path])
+    t, resistance, temp_prt, emf, temp_nist, temp_chart, difference = data
+    if np.isfinite(temp_prt).any():
+        sensor, temp, raw = 'PRT', temp_prt, resistance
+    else:
+        sensor, temp, raw = 'TC', display_temperature(temp_prt, temp_chart, temp_nist), emf
+    present = ~np.isnan(temp)
+    t, temp, raw, temp_nist, temp_chart, difference = (a[present] for a in (t, temp, raw, temp_nist, temp_chart, difference))
+    rows = []
+    for lo, hi in find_plateaus(t, temp, window, tolerance, min_points):
+        pt, ptemp = t[lo:hi], temp[lo:hi]
+        dt = pt - pt.mean()
+        drift = float((dt * (ptemp - ptemp.mean())).sum() / (dt * dt).sum() * 3600) if (dt * dt).sum() else float('nan')
+        row = {'channel': channel, 'Start': from_epoch_seconds(pt[0]), 'End': from_epoch_seconds(pt[-1]),
+               'Duration (min)': (pt[-1] - pt[0]) / 60, 'Samples': hi - lo, 'Sensor': sensor,
+               'Mean (°C)': ptemp.mean(), 'Std (°C)': ptemp.std(ddof=1), 'Min (°C)': ptemp.min(), 'Max (°C)': ptemp.max(),
+               'Drift (°C/h)': drift, 'Mean Raw (Ω / mV)': np.nanmean(raw[lo:hi]), 'Source': os.path.basename(path)}
+        if sensor == 'TC':
+            diff = difference[lo:hi]
+            diff = diff[~np.isnan(diff)]
+            row['NIST Mean (°C)'] = np.nanmean(temp_nist[lo:hi])
+            if len(diff):
+                row.update({'Chart Mean (°C)': np.nanmean(temp_chart[lo:hi]), 'Chart - NIST Mean (°C)': diff.mean(),
+                            'Chart - NIST Std (°C)': diff.std(ddof=1) if len(diff) > 1 else float('nan'),
+                            'Chart - NIST Max |Δ| (°C)': np.abs(diff).max()})
+        rows.append({key: float(value) if isinstance(value, np.floating) else value for key, value in row.items()})
+    return rows
+
+def generate_calibration_report(start, end, output, save_dir=None, window=REPORT_WINDOW_SECONDS,
+                                tolerance=REPORT_STABLE_RANGE, min_points=REPORT_MIN_POINTS, workers=None, progress=None):
+    """
+    Summarizes every stable plateau between start and end into an xlsx workbook with one
+    print-ready sheet per channel. Days without an archive but with a daily Excel log are
+    imported first (in parallel, once). Returns the number of plateaus found.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    start, end = to_epoch_seconds(start), to_epoch_seconds(end)
+    save_dir = save_dir or SAVE_DIR
+    paths, to_import = [], []
+    day, last_day = from_epoch_seconds(start).date(), from_epoch_seconds(end).date()
+    while day <= last_day:
+        path = archive_path(save_dir, day)
+        excel_file = os.path.join(save_dir, f"fluke_1529_{day:%Y%m%d}.xlsx")
+        if os.path.exists(path):
+            paths.append(path)
+        elif os.path.exists(excel_file):
+            to_import.append(excel_file)
+        day += timedelta(days=1)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        paths.extend(executor.map(import_excel_to_archive, to_import))
+        tasks = []
+        for path in sorted(paths):
+            index = archive_index(path)
+            index = index[(index['t_max'] >= start) & (index['t_min'] <= end)]
+            file_columns = archive_columns(path)
+            for ch in range(1, 5):
+                # Skip channels with no stored temperature in range, judged from the index alone
+                temp_cols = [file_columns.index(f'ch{ch}_{field}') for field in ('temp_prt', 'temp_nist', 'temp_chart')]
+                if np.isfinite(index['col_max'][:, temp_cols]).any():
+                    tasks.append(executor.submit(report_channel_plateaus, path, ch, start, end, window, tolerance, min_points))
+        for done, future in enumerate(as_completed(tasks), 1):
+            rows.extend(future.result())
+            if progress:
+                progress(done, len(tasks))
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for ch in range(1, 5):
+        channel_rows = sorted((row for row in rows if row['channel'] == ch), key=lambda row: row['Start'])
+        if not channel_rows:
+            continue
+        ws = wb.create_sheet(title=f"Ch{ch}")
+        ws.append([header for header, _ in REPORT_HEADERS])
+        for cell in ws[1]:
+            cell.font = Font(bold=True)
+        for row in channel_rows:
+            ws.append([None if isinstance(value, float) and math.isnan(value) else value
+                       for value in (row.get(header) for header, _ in REPORT_HEADERS)])
+        for i, (header, width) in enumerate(REPORT_HEADERS, 1):
+            letter = get_column_letter(i)
+            ws.column_dimensions[letter].width = width
+            number_format = 'yyyy-mm-dd hh:mm:ss' if header in ('Start', 'End') else '0.0' if header == 'Duration (min)' else \
+                '0' if header == 'Samples' else '@' if header in ('Sensor', 'Source') else '0.0000'
+            for cell in ws[letter][1:]:
+                cell.number_format = number_format
+        ws.freeze_panes = 'A2'
+        ws.print_title_rows = '1:1'
+        ws.page_setup.orientation = 'landscape'
+        ws.page_setup.fitToWidth = 1
+        ws.page_setup.fitToHeight = 0
+        ws.sheet_properties.pageSetUpPr.fitToPage = True
+    if not wb.sheetnames:
+        wb.create_sheet(title="Summary").append(["No stable plateaus found in the selected range."])
+    wb.save(output)
+    return len(rows)
+
+# --- Command Line ---
+def run_command_line(argv):
+    """Runs a headless command (python script.py <command> ...) and returns the exit code."""
+    import argparse
+    arg_parser = argparse.ArgumentParser(prog="script.py", description="Fluke 1529 data logger tools. Run without arguments for the GUI.")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    export_cmd = commands.add_parser('export', help="Stream archived records into xlsx files")
+    export_cmd.add_argument('start', help="Start date/time, e.g. '2025-06-10' or '2025-06-10 14:00'")
+    export_cmd.add_argument('end', help="End date/time (a bare date means the end of that day)")
+    export_cmd.add_argument('-o', '--output', help="Output xlsx file (default: fluke_1529_export_<start>_<end>.xlsx)")
+    export_cmd.add_argument('--dir', default=SAVE_DIR, help="Directory holding the archives")
+
+    replay_cmd = commands.add_parser('replay', help="Feed a raw serial capture through parsing, record assembly and the archive")
+    replay_cmd.add_argument('capture', help=f"Capture file ({CAPTURE_EXTENSION}) written with 'Capture raw serial data'")
+    replay_cmd.add_argument('-o', '--dir', help="Directory for the replayed archive (default: <capture>_replay next to the capture)")
+    speed = replay_cmd.add_mutually_exclusive_group()
+    speed.add_argument('--speed', type=float, default=1.0, help="Replay speed as a multiple of real time (default: 1)")
+    speed.add_argument('--max', action='store_true', help="Replay as fast as possible")
+    replay_cmd.add_argument('--reference', type=int, choices=range(1, 5), help="Reference channel for a comparison calibration fit")
+    replay_cmd.add_argument('--dut', type=int, nargs='+', choices=range(1, 5), default=[], help="Channels under test")
+    replay_cmd.add_argument('--degree', type=int, default=CALIBRATION_DEGREE, help="Deviation polynomial degree (default: %(default)s)")
+
+    report_cmd = commands.add_parser('report', help="Summarize stable plateaus per channel into an xlsx report")
+    report_cmd.add_argument('start', help="Start date/time, e.g. '2025-06-01'")
+    report_cmd.add_argument('end', help="End date/time (a bare date means the end of that day)")
+    report_cmd.add_argument('-o', '--output', help="Output xlsx file (default: fluke_1529_report_<start>_<end>.xlsx)")
+    report_cmd.add_argument('--dir', default=SAVE_DIR, help="Directory holding the archives and daily Excel logs")
+    report_cmd.add_argument('--window', type=float, default=REPORT_WINDOW_SECONDS, help="Stability window in seconds (default: %(default)s)")
+    report_cmd.add_argument('--tolerance', type=float, default=REPORT_STABLE_RANGE, help="Largest max - min within a stable window in °C (default: %(default)s)")
+    report_cmd.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+
+    soak_cmd = commands.add_parser('soak', help="Run simulated days of input through the pipeline and report memory use")
+    soak_cmd.add_argument('--days', type=float, default=14, help="Simulated days (default: %(default)s)")
+    soak_cmd.add_argument('--period', type=float, default=1.0, help="Simulated measurement period in seconds (default: %(default)s)")
+    soak_cmd.add_argument('--outage-hours', type=float, default=12, help="Hours of failing archive and Excel saves from day 2 on (default: %(default)s)")
+    soak_cmd.add_argument('--stall-hours', type=float, default=6, help="Hours the consumer stalls from day 2 on, backing up the sample transport (default: %(default)s)")
+    soak_cmd.add_argument('--report-hours', type=float, default=6, help="Simulated hours between memory reports (default: %(default)s)")
+    soak_cmd.add_argument('--dir', help="Directory for the simulated archives (default: a temporary directory, removed afterwards)")
+
+    args = arg_parser.parse_args(argv)
+    if args.command == 'export':
+        start, end = parse_range_arguments(args.start, args.end)
+        output = args.output or os.path.join(args.dir, f"fluke_1529_export_{start:%Y%m%d}_{end:%Y%m%d}.xlsx")
+        files = export_archive_to_excel(start, end, output, save_dir=args.dir,
+                                        progress=lambda n: print(f"\rExported {n} records", end="", flush=True))
+        print()
+        for path in files:
+            print(f"Wrote {path}")
+    elif args.command == 'replay':
+        out_dir = args.dir or os.path.splitext(args.capture)[0] + "_replay"
+        os.makedirs(out_dir, exist_ok=True)
+        if any(name.endswith(ARCHIVE_EXTENSION) for name in os.listdir(out_dir)):
+            print(f"{out_dir} already holds archives; replay into an empty directory")
+            return 1
+        if args.reference:
+            set_calibration_roles(args.reference, args.dut, args.degree)
+        stats = replay_capture(args.capture, out_dir, speed=0 if args.max else args.speed,
+                               progress=lambda st: print(f"\rReplayed {st['lines']} lines", end="", flush=True))
+        print()
+        busy = stats['busy_seconds'] or float('nan')
+        print(f"{stats['lines']} lines, {stats['samples']} samples, {stats['records']} records "
+              f"({stats['partial']} partial), {stats['errors']} parse errors, {stats['commands']} commands, "
+              f"{stats['config_changes']} configuration changes")
+        print(f"Processing {busy:.2f} s of {stats['elapsed_seconds']:.2f} s: "
+              f"{stats['lines'] / busy:.0f} lines/s, {stats['samples'] / busy:.0f} samples/s")
+        if stats['save_failures'] or stats['unsaved']:
+            print(f"{stats['save_failures']} failed saves, {stats['unsaved']} records left unsaved")
+        print(f"Archive written to {out_dir}")
+        if args.reference:
+            print(json.dumps(calibration_report(), indent=2))
+    elif args.command == 'report':
+        start, end = parse_range_arguments(args.start, args.end)
+        output = args.output or os.path.join(args.dir, f"fluke_1529_report_{start:%Y%m%d}_{end:%Y%m%d}.xlsx")
+        started = time.perf_counter()
+        n_plateaus = generate_calibration_report(start, end, output, save_dir=args.dir, window=args.window,
+                                                 tolerance=args.tolerance, workers=args.workers,
+                                                 progress=lambda done, total: print(f"\rSummarized {done}/{total} channel files", end="", flush=True))
+        print()
+        print(f"Wrote {n_plateaus} plateaus to {output} in {time.perf_counter() - started:.1f} s")
+    elif args.command == 'soak':
+        def report(stats, rss, memory):
+            sizes = ", ".join(f"{name} {items}" + (f" (+{spilled / 1e6:.1f} MB spilled)" if spilled else "")
+                              for name, items, _, _, spilled in memory if name != "Plot buffers")
+            print(f"Day {stats['time'] / 86400:5.1f}: RSS {rss / 1e6 if rss else float('nan'):7.1f} MB; {sizes}")
+        with tempfile.TemporaryDirectory(prefix="fluke_1529_soak_") as temp_dir:
+            stats, samples = run_soak_test(args.days, args.period, args.dir or temp_dir, args.outage_hours,
+                                           args.stall_hours, report_hours=args.report_hours, report=report)
+        print(f"{stats['lines']} lines, {stats['records']} records ({stats['partial']} partial), "
+              f"{stats['save_failures']} failed saves, {stats['unsaved']} unsaved, {stats['dropped']} samples dropped, "
+              f"in {stats['elapsed_seconds']:.0f} s")
+        rss = [(t, value) for t, value in samples if value]
+        if rss:
+            settled = [value for t, value in rss if t >= 86400] or [rss[-1][1]]
+            print(f"RSS: {rss[0][1] / 1e6:.1f} MB at start, {settled[0] / 1e6:.1f} MB after day 1, "
+                  f"{max(settled) / 1e6:.1f} MB peak and {rss[-1][1] / 1e6:.1f} MB at the end of the run")
+    return 0
+
+def parse_range_arguments(start, end):
+    """Parses start/end strings; an end given as a bare date covers that whole day."""
+    start_dt = parser.parse(start)
+    end_dt = parser.parse(end)
+    if len(end.strip()) <= 10:
+        end_dt = end_dt + timedelta(days=1) - timedelta(microseconds=1)
+    return start_dt, end_dt
+
+if __name__ == '__main__' and len(sys.argv) > 1:
+    sys.exit(run_command_line(sys.argv[1:]))
 
 # --- GUI Setup ---
-root = tk.Tk()
-root.title("Fluke 1529 Data Logger")
-root.geometry("1366x768")
-root.configure(bg="#f0f0f0")
-root.columnconfigure(0, weight=1)
-root.rowconfigure(0, weight=1)
-
-# Initialize BooleanVar for channel_configs after root creation
-for i in range(1, 5):
-    channel_configs[i]['enabled'] = tk.BooleanVar(value=True)
-
-style = ttk.Style()
-style.theme_use('clam')
-style.configure("TLabel", background="#f0f0f0", font=("Arial", 11))
-style.configure("TButton", padding=6, font=("Arial", 10))
-style.configure("TCombobox", padding=5, font=("Arial", 10))
-style.configure("Card.TFrame", background="#ffffff", relief="solid", borderwidth=1)
-
-main_frame = ttk.Frame(root, padding=10)
-main_frame.pack(fill="both", expand=True)
-left_panel = ttk.Frame(main_frame, style="Card.TFrame")
-left_panel.grid(row=0, column=0, sticky="nsew", padx=(0, 10))
-right_panel = ttk.Frame(main_frame, style="Card.TFrame")
-right_panel.grid(row=0, column=1, sticky="nsew")
-main_frame.columnconfigure(1, weight=3)
-
-real_time_frame = ttk.LabelFrame(left_panel, text="Real-Time Values (Chart-based for TC)", padding=10)
-real_time_frame.pack(fill="x", pady=5, padx=5)
-
-value_labels = {}
-for i in range(1, 5):
-    ttk.Label(real_time_frame, text=f"Channel {i}:", font=("Arial", 11, "bold")).grid(row=i-1, column=0, sticky="w", padx=5)
-    raw_label = ttk.Label(real_time_frame, text="N/A", font=("Arial", 12))
-    raw_label.grid(row=i-1, column=1, sticky="w", padx=5)
-    temp_label = ttk.Label(real_time_frame, text="N/A", font=("Arial", 14), foreground="#e74c3c")
-    temp_label.grid(row=i-1, column=2, sticky="w", padx=10)
-    value_labels[i] = {'raw': raw_label, 'temp': temp_label}
-
-controls_frame = ttk.LabelFrame(left_panel, text="Controls", padding=10)
-controls_frame.pack(fill="x", pady=5, padx=5)
-
-conn_frame = ttk.Frame(controls_frame)
-conn_frame.pack(fill="x")
-com_ports = [port.device for port in serial.tools.list_ports.comports()]
-com_port_var = tk.StringVar(value=com_ports[0] if com_ports else "")
-ttk.Label(conn_frame, text="COM Port:").grid(row=0, column=0, sticky="w", padx=5)
-com_port_combo = ttk.Combobox(conn_frame, textvariable=com_port_var, values=com_ports, state="readonly")
-com_port_combo.grid(row=0, column=1, padx=5)
-
-ttk.Label(conn_frame, text="Baud:").grid(row=0, column=2, sticky="w", padx=5)
-baud_rate_var = tk.IntVar(value=9600)
-baud_rate_combo = ttk.Combobox(conn_frame, textvariable=baud_rate_var, values=[9600, 19200, 38400, 57600, 115200], state="readonly")
-baud_rate_combo.grid(row=0, column=3, padx=5)
-
-btn_frame = ttk.Frame(controls_frame)
-btn_frame.pack(fill="x", pady=5)
-start_button = ttk.Button(btn_frame, text="Start Logging", command=lambda: start_logging())
-start_button.pack(side="left", padx=2)
-stop_button = ttk.Button(btn_frame, text="Stop Logging", command=lambda: stop_logging(), state="disabled")
-stop_button.pack(side="left", padx=2)
-calibrate_button = ttk.Button(btn_frame, text="Calibrate Time", command=lambda: calibrate_time())
-calibrate_button.pack(side="left", padx=2)
-
-settings_frame = ttk.LabelFrame(left_panel, text="Settings", padding=10)
-settings_frame.pack(fill="x", pady=5, padx=5)
-
-ttk.Label(settings_frame, text="Measure Period:").grid(row=0, column=0, sticky="w", pady=2)
-meas_period_var = tk.StringVar(value="1s")
-meas_period_combo = ttk.Combobox(settings_frame, textvariable=meas_period_var, values=["0.1s", "0.2s", "0.5s", "1s", "2s", "5s", "10s", "30s", "1min", "2min", "5min", "10min", "30min", "1hr"], state="readonly")
-meas_period_combo.grid(row=0, column=1, sticky="w", pady=2)
-
-ttk.Label(settings_frame, text="Save Directory:").grid(row=1, column=0, sticky="w", pady=2)
-save_dir_var = tk.StringVar(value=SAVE_DIR)
-ttk.Entry(settings_frame, textvariable=save_dir_var, state="readonly").grid(row=1, column=1, sticky="w", pady=2)
-ttk.Button(settings_frame, text="Browse", command=lambda: browse_directory(save_dir_var)).grid(row=1, column=2, padx=5, pady=2)
-
-channel_enable_frame = ttk.LabelFrame(left_panel, text="Channel Enable", padding=10)
-channel_enable_frame.pack(fill="x", pady=5, padx=5)
-for i in range(1, 5):
-    ttk.Checkbutton(channel_enable_frame, text=f"Enable Channel {i}", variable=channel_configs[i]['enabled']).grid(row=i-1, column=0, sticky="w", padx=5, pady=2)
-
-unit_frame = ttk.LabelFrame(left_panel, text="Unit Settings", padding=10)
-unit_frame.pack(fill="x", pady=5, padx=5)
-
-unit_vars = {i: tk.StringVar(value=channel_configs[i]['unit']) for i in range(1, 5)}
-for i in range(1, 5):
-    ttk.Label(unit_frame, text=f"Ch {i} Unit:").grid(row=i-1, column=0, sticky="e", padx=5, pady=2)
-    unit_combo = ttk.Combobox(unit_frame, textvariable=unit_vars[i], values=["O", "MV"], state="readonly")
-    unit_combo.grid(row=i-1, column=1, padx=5, pady=2)
-    unit_combo.bind('<<ComboboxSelected>>', lambda event, ch=i: send_unit_command(ch))
-
-plot_frame = ttk.Frame(right_panel, padding=10)
-plot_frame.pack(fill="both", expand=True)
-
-toggle_frame = ttk.Frame(plot_frame)
-toggle_frame.pack(fill="x", pady=5)
-ttk.Label(toggle_frame, text="Select Channel for Main Plot:").pack(side="left", padx=5)
-channel_buttons = {}
-for i in range(1, 5):
-    btn = ttk.Button(toggle_frame, text=f"Ch {i}", command=lambda ch=i: set_active_channel(ch))
-    btn.pack(side="left", padx=2)
-    channel_buttons[i] = btn
-
-sub_toggle_frame = ttk.Frame(plot_frame)
-sub_toggle_frame.pack(fill="x", pady=5)
-ttk.Button(sub_toggle_frame, text="Raw vs Time", command=lambda: set_plot_type("raw")).pack(side="left", padx=2)
-ttk.Button(sub_toggle_frame, text="Temp vs Time", command=lambda: set_plot_type("temp")).pack(side="left", padx=2)
-ttk.Button(sub_toggle_frame, text="All Temp vs Time", command=lambda: show_all_channels()).pack(side="left", padx=2)
-
-checkbox_frame = ttk.Frame(plot_frame)
-checkbox_frame.pack(fill="x", pady=5)
-check_vars = {i: tk.BooleanVar() for i in range(1, 5)}
-for i in range(1, 5):
-    ttk.Checkbutton(checkbox_frame, text=f"Open Ch {i} in Separate Window", variable=check_vars[i],
-                    command=lambda ch=i: toggle_separate_window(ch)).pack(side="left", padx=2)
-
-fig, ax = plt.subplots(figsize=(10, 6))
-fig.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.15)
-ax.grid(True)
-ax.set_xlabel("Time")
-ax.set_ylabel("Value")
-ax.tick_params(axis='x', rotation=45)
-
-lines = {}
-for i in range(1, 5):
-    if channel_configs[i]['type'] == 'RES':
-        lines[f'ch{i}_prt'] = ax.plot([], [], label=f'Ch {i} PRT Temp (°C)', color=f'C{i-1}')[0]
-    elif channel_configs[i]['type'] == 'TC':
-        lines[f'ch{i}_nist'] = ax.plot([], [], label=f'Ch {i} TC Temp (NIST) (°C)', color=f'C{i-1}', linestyle='-')[0]
-        lines[f'ch{i}_chart'] = ax.plot([], [], label=f'Ch {i} TC Temp (Chart) (°C)', color=f'C{i-1}', linestyle='--')[0]
+if __name__ == '__main__':  # Not when a report worker process imports this file
+    root = tk.Tk()
+    root.title("Fluke 1529 Data Logger")
+    root.geometry("1366x768")
+    root.configure(bg="#f0f0f0")
+    root.columnconfigure(0, weight=1)
+    root.rowconfigure(0, weight=1)
+
+    # Initialize BooleanVar for channel_configs after root creation
+    for i in range(1, 5):
+        channel_configs[i]['enabled'] = tk.BooleanVar(value=True)
+
+    style = ttk.Style()
+    style.theme_use('clam')
+    style.configure("TLabel", background="#f0f0f0", font=("Arial", 11))
+    style.configure("TButton", padding=6, font=("Arial", 10))
+    style.configure("TCombobox", padding=5, font=("Arial", 10))
+    style.configure("Card.TFrame", background="#ffffff", relief="solid", borderwidth=1)
+
+    main_frame = ttk.Frame(root, padding=10)
+    main_frame.pack(fill="both", expand=True)
+    left_panel = ttk.Frame(main_frame, style="Card.TFrame")
+    left_panel.grid(row=0, column=0, sticky="nsew", padx=(0, 10))
+    right_panel = ttk.Frame(main_frame, style="Card.TFrame")
+    right_panel.grid(row=0, column=1, sticky="nsew")
+    main_frame.columnconfigure(1, weight=3)
+
+    real_time_frame = ttk.LabelFrame(left_panel, text="Real-Time Values (Chart-based for TC)", padding=10)
+    real_time_frame.pack(fill="x", pady=5, padx=5)
+
+    value_labels = {}
+    for i in range(1, 5):
+        ttk.Label(real_time_frame, text=f"Channel {i}:", font=("Arial", 11, "bold")).grid(row=i-1, column=0, sticky="w", padx=5)
+        raw_label = ttk.Label(real_time_frame, text="N/A", font=("Arial", 12))
+        raw_label.grid(row=i-1, column=1, sticky="w", padx=5)
+        temp_label = ttk.Label(real_time_frame, text="N/A", font=("Arial", 14), foreground="#e74c3c")
+        temp_label.grid(row=i-1, column=2, sticky="w", padx=10)
+        value_labels[i] = {'raw': raw_label, 'temp': temp_label}
+
+    alarm_frame = ttk.LabelFrame(left_panel, text="Alarms", padding=10)
+    alarm_frame.pack(fill="x", pady=5, padx=5)
+    alarm_status_var = tk.StringVar(value="No active alarms")
+    alarm_status_label = ttk.Label(alarm_frame, textvariable=alarm_status_var, font=("Arial", 11, "bold"))
+    alarm_status_label.pack(anchor="w")
+    alarm_listbox = tk.Listbox(alarm_frame, height=4, font=("Arial", 9))
+    alarm_listbox.pack(fill="x")
+    alarm_gui_events = queue.Queue(maxsize=ALARM_EVENTS_MAX)
+    alarm_actions.append(alarm_action_queue(alarm_gui_events))  # The GUI drains these in ingest_tick; the serial thread never waits on Tk
+    active_alarms = {}
+
+    controls_frame = ttk.LabelFrame(left_panel, text="Controls", padding=10)
+    controls_frame.pack(fill="x", pady=5, padx=5)
+
+    conn_frame = ttk.Frame(controls_frame)
+    conn_frame.pack(fill="x")
+    com_ports = [port.device for port in serial.tools.list_ports.comports()]
+    com_port_var = tk.StringVar(value=com_ports[0] if com_ports else "")
+    ttk.Label(conn_frame, text="COM Port:").grid(row=0, column=0, sticky="w", padx=5)
+    com_port_combo = ttk.Combobox(conn_frame, textvariable=com_port_var, values=com_ports, state="readonly")
+    com_port_combo.grid(row=0, column=1, padx=5)
+
+    ttk.Label(conn_frame, text="Baud:").grid(row=0, column=2, sticky="w", padx=5)
+    baud_rate_var = tk.IntVar(value=9600)
+    baud_rate_combo = ttk.Combobox(conn_frame, textvariable=baud_rate_var, values=[9600, 19200, 38400, 57600, 115200], state="readonly")
+    baud_rate_combo.grid(row=0, column=3, padx=5)
+
+    btn_frame = ttk.Frame(controls_frame)
+    btn_frame.pack(fill="x", pady=5)
+    start_button = ttk.Button(btn_frame, text="Start Logging", command=lambda: start_logging())
+    start_button.pack(side="left", padx=2)
+    stop_button = ttk.Button(btn_frame, text="Stop Logging", command=lambda: stop_logging(), state="disabled")
+    stop_button.pack(side="left", padx=2)
+    calibrate_button = ttk.Button(btn_frame, text="Calibrate Time", command=lambda: calibrate_time())
+    calibrate_button.pack(side="left", padx=2)
+    export_button = ttk.Button(btn_frame, text="Export XLSX", command=lambda: export_excel_dialog())
+    export_button.pack(side="left", padx=2)
+
+    settings_frame = ttk.LabelFrame(left_panel, text="Settings", padding=10)
+    settings_frame.pack(fill="x", pady=5, padx=5)
+
+    ttk.Label(settings_frame, text="Measure Period:").grid(row=0, column=0, sticky="w", pady=2)
+    meas_period_var = tk.StringVar(value="1s")
+    meas_period_combo = ttk.Combobox(settings_frame, textvariable=meas_period_var, values=["0.1s", "0.2s", "0.5s", "1s", "2s", "5s", "10s", "30s", "1min", "2min", "5min", "10min", "30min", "1hr"], state="readonly")
+    meas_period_combo.grid(row=0, column=1, sticky="w", pady=2)
+
+    ttk.Label(settings_frame, text="Save Directory:").grid(row=1, column=0, sticky="w", pady=2)
+    save_dir_var = tk.StringVar(value=SAVE_DIR)
+    ttk.Entry(settings_frame, textvariable=save_dir_var, state="readonly").grid(row=1, column=1, sticky="w", pady=2)
+    ttk.Button(settings_frame, text="Browse", command=lambda: browse_directory(save_dir_var)).grid(row=1, column=2, padx=5, pady=2)
+
+    capture_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(settings_frame, text="Capture raw serial data for replay", variable=capture_var).grid(row=2, column=0, columnspan=3, sticky="w", pady=2)
+
+    channel_enable_frame = ttk.LabelFrame(left_panel, text="Channel Enable", padding=10)
+    channel_enable_frame.pack(fill="x", pady=5, padx=5)
+    for i in range(1, 5):
+        ttk.Checkbutton(channel_enable_frame, text=f"Enable Channel {i}", variable=channel_configs[i]['enabled'], command=lambda: request_render()).grid(row=i-1, column=0, sticky="w", padx=5, pady=2)
+
+    unit_frame = ttk.LabelFrame(left_panel, text="Unit Settings", padding=10)
+    unit_frame.pack(fill="x", pady=5, padx=5)
+
+    unit_vars = {i: tk.StringVar(value=channel_configs[i]['unit']) for i in range(1, 5)}
+    tc_type_vars = {i: tk.StringVar(value=channel_configs[i]['tc_type']) for i in range(1, 5)}
+    cj_vars = {i: tk.StringVar(value="0 °C") for i in range(1, 5)}
+    for i in range(1, 5):
+        ttk.Label(unit_frame, text=f"Ch {i} Unit:").grid(row=i-1, column=0, sticky="e", padx=5, pady=2)
+        unit_combo = ttk.Combobox(unit_frame, textvariable=unit_vars[i], values=["O", "MV"], state="readonly", width=5)
+        unit_combo.grid(row=i-1, column=1, padx=5, pady=2)
+        unit_combo.bind('<<ComboboxSelected>>', lambda event, ch=i: send_unit_command(ch))
+        tc_combo = ttk.Combobox(unit_frame, textvariable=tc_type_vars[i], values=TC_TYPES, state="readonly", width=3)
+        tc_combo.grid(row=i-1, column=2, padx=5, pady=2)
+        tc_combo.bind('<<ComboboxSelected>>', lambda event, ch=i: set_thermocouple_config(ch))
+        ttk.Label(unit_frame, text="CJ:").grid(row=i-1, column=3, sticky="e", padx=2, pady=2)
+        cj_combo = ttk.Combobox(unit_frame, textvariable=cj_vars[i], values=["0 °C"] + [f"Ch{j}" for j in range(1, 5) if j != i], state="readonly", width=6)
+        cj_combo.grid(row=i-1, column=4, padx=5, pady=2)
+        cj_combo.bind('<<ComboboxSelected>>', lambda event, ch=i: set_thermocouple_config(ch))
+
+    plot_frame = ttk.Frame(right_panel, padding=10)
+    plot_frame.pack(fill="both", expand=True)
+
+    toggle_frame = ttk.Frame(plot_frame)
+    toggle_frame.pack(fill="x", pady=5)
+    ttk.Label(toggle_frame, text="Select Channel for Main Plot:").pack(side="left", padx=5)
+    channel_buttons = {}
+    for i in range(1, 5):
+        btn = ttk.Button(toggle_frame, text=f"Ch {i}", command=lambda ch=i: set_active_channel(ch))
+        btn.pack(side="left", padx=2)
+        channel_buttons[i] = btn
+
+    sub_toggle_frame = ttk.Frame(plot_frame)
+    sub_toggle_frame.pack(fill="x", pady=5)
+    ttk.Button(sub_toggle_frame, text="Raw vs Time", command=lambda: set_plot_type("raw")).pack(side="left", padx=2)
+    ttk.Button(sub_toggle_frame, text="Temp vs Time", command=lambda: set_plot_type("temp")).pack(side="left", padx=2)
+    ttk.Button(sub_toggle_frame, text="All Temp vs Time", command=lambda: show_all_channels()).pack(side="left", padx=2)
+    ttk.Button(sub_toggle_frame, text="History Viewer", command=lambda: open_history_viewer()).pack(side="left", padx=2)
+    ttk.Button(sub_toggle_frame, text="Comparison Calibration", command=lambda: open_calibration_view()).pack(side="left", padx=2)
+    ttk.Button(sub_toggle_frame, text="Diagnostics", command=lambda: open_diagnostics_view()).pack(side="left", padx=2)
+
+    checkbox_frame = ttk.Frame(plot_frame)
+    checkbox_frame.pack(fill="x", pady=5)
+    check_vars = {i: tk.BooleanVar() for i in range(1, 5)}
+    for i in range(1, 5):
+        ttk.Checkbutton(checkbox_frame, text=f"Open Ch {i} in Separate Window", variable=check_vars[i],
+                        command=lambda ch=i: toggle_separate_window(ch)).pack(side="left", padx=2)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    fig.subplots_adjust(left=0.1, right=0.9, top=0.9, bottom=0.15)
+    ax.grid(True)
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Value")
+    ax.tick_params(axis='x', rotation=45)
+
+    lines = {}
+    for i in range(1, 5):
+        if channel_configs[i]['type'] == 'RES':
+            lines[f'ch{i}_prt'] = ax.plot([], [], label=f'Ch {i} PRT Temp (°C)', color=f'C{i-1}')[0]
+        elif channel_configs[i]['type'] == 'TC':
+            lines[f'ch{i}_nist'] = ax.plot([], [], label=f'Ch {i} TC Temp (NIST) (°C)', color=f'C{i-1}', linestyle='-')[0]
+            lines[f'ch{i}_chart'] = ax.plot([], [], label=f'Ch {i} TC Temp (Chart) (°C)', color=f'C{i-1}', linestyle='--')[0]
     
-for key in lines:
-    lines[key].set_visible(False)
+    for key in lines:
+        lines[key].set_visible(False)
 
-canvas = FigureCanvasTkAgg(fig, master=plot_frame)
-canvas.get_tk_widget().pack(fill="both", expand=True)
-toolbar = NavigationToolbar2Tk(canvas, plot_frame)
-toolbar.update()
-toolbar.pack(side="bottom", fill="x")
+    canvas = FigureCanvasTkAgg(fig, master=plot_frame)
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    toolbar = NavigationToolbar2Tk(canvas, plot_frame)
+    toolbar.update()
+    toolbar.pack(side="bottom", fill="x")
 
-window_figures = {i: None for i in range(1, 5)}
-window_canvases = {i: None for i in range(1, 5)}
-window_axes = {i: None for i in range(1, 5)}
-window_lines = {i: {} for i in range(1, 5)}
+    window_figures = {i: None for i in range(1, 5)}
+    window_canvases = {i: None for i in range(1, 5)}
+    window_axes = {i: None for i in range(1, 5)}
+    window_lines = {i: {} for i in range(1, 5)}
+    window_render_state = {i: {'dirty': True, 'version': -1, 'interval_ms': SEPARATE_WINDOW_REFRESH_MS, 'last_draw': 0.0} for i in range(1, 5)}
+    data_version = 0  # Incremented whenever new samples reach plot_data
+    plot_view_cache = {'version': -1, 'x': None, 'series': {}}
+    history_view = {'window': None, 'fig': None, 'ax': None, 'canvas': None, 'lines': {}, 'paths': [], 'mode': None, 'info': None, 'after_id': None}
+    calibration_view = {'window': None, 'tree': None, 'reference': None, 'duts': {}, 'degree': None, 'after_id': None}
+    diagnostics_view = {'window': None, 'tree': None, 'rss': None, 'after_id': None}
+
+    status_var = tk.StringVar(value="Ready. Select COM port and press Start.")
+    ttk.Frame(root, padding=5).pack(fill="x", side="bottom")
+    ttk.Label(root, textvariable=status_var).pack(side="left", padx=10)
 
-status_var = tk.StringVar(value="Ready. Select COM port and press Start.")
-ttk.Frame(root, padding=5).pack(fill="x", side="bottom")
-ttk.Label(root, textvariable=status_var).pack(side="left", padx=10)
 
 # --- Core Logic ---
 def serial_reader_thread():
@@ -357,36 +2222,71 @@ def serial_reader_thread():
         stop_event.set()
         return
 
+    ser.timeout = SERIAL_READ_TIMEOUT
+    parse_state = new_parse_state()
+    capture = None
+    if capture_var.get():
+        try:
+            capture = SerialCapture(capture_path(save_dir_var.get(), datetime.now()))
+        except OSError as e:
+            print(f"Could not open serial capture: {e}")
+    pending = b''
+    line = ''
     while not stop_event.is_set():
         try:
             while not command_queue.empty():
                 cmd = command_queue.get()
                 ser.write((cmd + '\n').encode())
-                time.sleep(0.1)
-            if ser.in_waiting:
-                line = ser.readline().decode(errors='ignore').strip()
-                print(f"Raw serial data: {line}")  # Debug: Print raw serial data
-                line_parts = line.split()
-                if len(line_parts) >= 5:
-                    channel = int(line_parts[0])
-                    if not channel_configs[channel]['enabled'].get():
-                        continue
-                    raw_val_str = line_parts[1]
-                    if raw_val_str == '........':
-                        continue
+                if capture:
                     try:
-                        raw_val = float(raw_val_str)
-                    except ValueError:
-                        print(f"Error parsing serial data: could not convert string to float: '{raw_val_str}' - Line: {line}")
-                        status_var.set(f"Data parsing error for Channel {channel}")
-                        continue
-                    unit = line_parts[2]
-                    timestamp_str = f"{line_parts[4]} {line_parts[3]}"
-                    data_queue.put({'channel': channel, 'raw_val': raw_val, 'unit': unit, 'timestamp': timestamp_str})
-                    status_var.set(f"Received data for Channel {channel}: {raw_val} {unit}")
-                    print(f"Queued data: Channel {channel}, Value {raw_val}, Unit {unit}, Timestamp {timestamp_str}")
-                else:
-                    print(f"Invalid serial data format: {line}")
+                        capture.write(CAPTURE_COMMAND, cmd)
+                    except OSError as e:
+                        status_var.set(stop_capture(capture, e))
+                        capture = None
+                time.sleep(0.1)
+            # Block until a line arrives (or the timeout lapses) instead of polling in_waiting,
+            # then take every further line already buffered as one batch
+            lines, raw_lines = [], []
+            chunk = ser.readline()
+            while chunk:
+                if not chunk.endswith(b'\n'):
+                    pending += chunk  # Timed out mid-line; keep the fragment for the next read
+                    break
+                raw_line, receive_time = pending + chunk, time.monotonic()
+                line = raw_line.decode(errors='ignore').strip()
+                pending = b''
+                lines.append((line, receive_time))
+                if capture:
+                    raw_lines.append(raw_line)
+                if len(lines) >= TRANSPORT_BATCH_MAX or not ser.in_waiting:
+                    break
+                chunk = ser.readline()
+            if capture:
+                # Configuration first: this batch is about to be converted with it
+                try:
+                    capture.check_config()
+                    for (_, receive_time), raw_line in zip(lines, raw_lines):
+                        capture.write(CAPTURE_LINE, raw_line, receive_time)
+                    if lines:
+                        capture.flush()
+                except OSError as e:
+                    status_var.set(stop_capture(capture, e))
+                    capture = None
+            if lines:
+                block = parse_serial_lines(lines, parse_state)
+                if len(block):
+                    for i in range(len(block)):
+                        evaluate_alarms(int(block['channel'][i]), block[i], float(block['receive_time'][i]))
+                    queued = sample_transport.put(block)
+                    samples_ready.set()
+                    last = block[-1]
+                    if queued:
+                        status_var.set(f"Received {len(block)} sample(s); last Channel {last['channel']}: {last['temp']:.4f} °C")
+                    else:
+                        status_var.set(f"Sample spill failed; {sample_transport.dropped} sample(s) dropped")
+                    if VERBOSE_SERIAL_LOG:
+                        print(f"Queued {len(block)} samples")
+            check_alarm_timeouts(time.monotonic())
         except (ValueError, IndexError) as e:
             print(f"Error parsing serial data: {e} - Line: {line}")
             status_var.set(f"Data parsing error: {e}")
@@ -398,125 +2298,183 @@ def serial_reader_thread():
             status_var.set(f"Unexpected serial thread error: {e}")
             break
 
+    if capture:
+        try:
+            capture.close()
+        except OSError as e:
+            status_var.set(stop_capture(capture, e))
     if ser and ser.is_open:
         ser.close()
     status_var.set("Disconnected")
 
-def animate(frame):
-    """Updates plots in real-time by processing data from the queue."""
-    global last_save_time, current_record
-
-    # Process data from the queue
-    while not data_queue.empty():
-        data = data_queue.get()
-        channel = data['channel']
-        timestamp_str = data['timestamp']
-        try:
-            timestamp = datetime.strptime(timestamp_str, '%d/%m/%Y %H:%M:%S')
-        except ValueError:
-            try:
-                timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-            except ValueError:
-                try:
-                    timestamp = parser.parse(timestamp_str)
-                except Exception as e:
-                    print(f"Failed to parse timestamp: {timestamp_str} — {e}")
-                    continue
-        unit = data['unit']
-        raw_val = data['raw_val']
+def ingest_tick():
+    """
+    Drains new samples, assembles and saves records on its own cadence, and requests a
+    render only when new samples arrived. Runs every INGEST_POLL_MS while logging.
+    """
+    global ingest_after_id, last_save_time, save_retry_time
+    ingest_after_id = root.after(INGEST_POLL_MS, ingest_tick)
+    if not alarm_gui_events.empty():
+        update_alarm_panel()
+    if samples_ready.is_set():
+        samples_ready.clear()
+        if ingest_samples():
+            request_render()
+        if len(sample_transport):
+            samples_ready.set()  # Spilled samples are handed over in portions, one per tick
 
-        # Initialize current_record for this timestamp if not present
-        timestamp_key = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-        if timestamp_key not in current_record:
-            current_record[timestamp_key] = {'channels': {}, 'receive_time': time.time()}
-
-        # Update plot_data and latest_values immediately for real-time display
-        emf, temp_nist, temp_chart, resistance, temp_prt = float('nan'), float('nan'), float('nan'), float('nan'), float('nan')
-        if channel_configs[channel]['type'] == 'RES':
-            resistance = raw_val
-            try:
-                temp_prt = its90_temperature(resistance)
-            except ValueError as e:
-                temp_prt = float('nan')
-                print(f"PRT conversion error for Ch{channel}: {e}")
-            plot_data[channel]['resistance'].append(resistance)
-            plot_data[channel]['temp_prt'].append(temp_prt)
-            latest_values[channel]['raw'] = f"{resistance:.4f} Ω"
-            latest_values[channel]['temp'] = f"{temp_prt:.4f} °C" if not math.isnan(temp_prt) else "N/A"
-            current_record[timestamp_key]['channels'][channel] = {'resistance': resistance, 'temp_prt': temp_prt}
-        elif channel_configs[channel]['type'] == 'TC':
-            emf = raw_val
-            try:
-                temp_nist = emf_to_temperature_nist(emf)
-            except ValueError as e:
-                temp_nist = float('nan')
-                print(f"TC NIST conversion error for Ch{channel}: {e}")
-            try:
-                temp_chart = convert_emf_to_temp_table_interpolation(emf)
-            except ValueError as e:
-                temp_chart = float('nan')
-                print(f"TC Chart conversion error for Ch{channel}: {e}")
-            difference = temp_chart - temp_nist if not math.isnan(temp_nist) and not math.isnan(temp_chart) else float('nan')
-            plot_data[channel]['emf'].append(emf)
-            plot_data[channel]['temp_nist'].append(temp_nist)
-            plot_data[channel]['temp_chart'].append(temp_chart)
-            latest_values[channel]['raw'] = f"{emf:.4f} mV"
-            latest_values[channel]['temp'] = f"{temp_chart:.4f} °C" if not math.isnan(temp_chart) else "N/A"
-            current_record[timestamp_key]['channels'][channel] = {'emf': emf, 'temp_nist': temp_nist, 'temp_chart': temp_chart, 'difference': difference}
+    current_time = time.time()
+    if current_record:
+        assemble_records(assembly_clock(time.monotonic(), last_taken_receive_time))
+    pending = max(len(new_records_buffer), len(archive_rows_buffer))
+    if pending and current_time >= save_retry_time and \
+            (pending >= SAVE_INTERVAL_RECORDS or (current_time - last_save_time >= SAVE_INTERVAL_SECONDS)):
+        # Unsaved rows stay buffered (spilling to disk past their budget) until a save succeeds.
+        # One batch per tick, so working off a backlog never blocks the GUI for long.
+        saved = save_pending(new_records_buffer, save_to_excel, max_batches=1)
+        saved = save_pending(archive_rows_buffer, save_to_archive, max_batches=1) and saved
+        last_save_time = current_time
+        save_retry_time = 0 if saved else current_time + SAVE_RETRY_SECONDS
+
+def ingest_samples():
+    """Moves the samples handed over by the serial thread into plot data and pending records. Returns the number processed."""
+    global data_version, last_taken_receive_time
+    block = sample_transport.take()
+    n = len(block)
+    if not n:
+        return 0
+    last_taken_receive_time = float(block['receive_time'][-1])
+    values = add_samples_to_records(block)
+    last_sample = {}
+    last_epoch, timestamp = None, None
+    for i, (channel, epoch) in enumerate(zip(block['channel'].tolist(), block['timestamp'].tolist())):
+        # Update plot_data immediately for real-time display
+        sample = values[i]
+        if sample[0] == sample[0]:  # resistance present: PRT sample
+            plot_data[channel]['resistance'].append(float(sample[0]))
+            plot_data[channel]['temp_prt'].append(float(sample[1]))
+        else:
+            plot_data[channel]['emf'].append(float(sample[2]))
+            plot_data[channel]['temp_nist'].append(float(sample[3]))
+            plot_data[channel]['temp_chart'].append(float(sample[4]))
+        last_sample[channel] = i
 
+        if epoch != last_epoch:
+            last_epoch, timestamp = epoch, from_epoch_seconds(epoch)
         if not plot_timestamps or timestamp > plot_timestamps[-1]:
             plot_timestamps.append(timestamp)
 
-    # Check for complete or timed-out records
-    enabled_channels = [ch for ch in range(1, 5) if channel_configs[ch]['enabled'].get()]
-    current_time = time.time()
-    for timestamp_key in list(current_record.keys()):
-        record_data = current_record[timestamp_key]
-        received_channels = set(record_data['channels'].keys())
-        if all(ch in received_channels for ch in enabled_channels) or \
-           (current_time - record_data['receive_time'] >= TIMESTAMP_TIMEOUT):
-            # Create a single record for this timestamp
-            record = [timestamp_key]
-            for ch in range(1, 5):
-                if ch in record_data['channels']:
-                    if channel_configs[ch]['type'] == 'RES':
-                        record.extend([
-                            record_data['channels'][ch]['resistance'],
-                            record_data['channels'][ch]['temp_prt']
-                        ])
-                    elif channel_configs[ch]['type'] == 'TC':
-                        record.extend([
-                            record_data['channels'][ch]['emf'],
-                            record_data['channels'][ch]['temp_nist'],
-                            record_data['channels'][ch]['temp_chart'],
-                            record_data['channels'][ch]['difference']
-                        ])
-                else:
-                    if channel_configs[ch]['type'] == 'RES':
-                        record.extend([float('nan'), float('nan')])
-                    elif channel_configs[ch]['type'] == 'TC':
-                        record.extend([float('nan'), float('nan'), float('nan'), float('nan')])
-            new_records_buffer.append(record)
-            print(f"Processed record for timestamp {timestamp_key}: {record}")
-            del current_record[timestamp_key]
+    # Labels only need each channel's newest sample in the batch
+    for channel, i in last_sample.items():
+        sample, temp_display = values[i], float(block['temp'][i])
+        if sample[0] == sample[0]:
+            latest_values[channel]['raw'] = f"{sample[0]:.4f} Ω"
+        else:
+            latest_values[channel]['raw'] = f"{sample[2]:.4f} mV"
+        latest_values[channel]['temp'] = f"{temp_display:.4f} °C" if not math.isnan(temp_display) else "N/A"
+    data_version += 1
+    return n
+
+def update_alarm_panel():
+    """Shows alarm events queued by the acquisition thread and rings the bell on new alarms."""
+    while not alarm_gui_events.empty():
+        event = alarm_gui_events.get()
+        state = "ALARM" if event['active'] else "cleared"
+        alarm_listbox.insert(0, f"{event['time']:%H:%M:%S} {state}: {event['name']} ({event['value']:.3f})")
+        if alarm_listbox.size() > ALARM_HISTORY_LINES:
+            alarm_listbox.delete(ALARM_HISTORY_LINES, "end")
+        if event['active']:
+            active_alarms[event['name']] = event
+            root.bell()
+        else:
+            active_alarms.pop(event['name'], None)
+    if active_alarms:
+        alarm_status_var.set("ACTIVE: " + ", ".join(active_alarms))
+        alarm_status_label.config(foreground="#e74c3c")
+    else:
+        alarm_status_var.set("No active alarms")
+        alarm_status_label.config(foreground="")
 
+def request_render(delay_ms=None):
+    """Schedules one render, no sooner than the adaptive frame interval allows."""
+    global render_after_id
+    if render_after_id is not None:
+        return
+    if delay_ms is None:
+        elapsed_ms = (time.perf_counter() - last_render_time) * 1000
+        delay_ms = max(0, render_interval_ms - elapsed_ms)
+    render_after_id = root.after(int(delay_ms), render_frame)
+
+def render_frame():
+    """Redraws labels, the main plot and due separate windows, then adapts the frame interval to the draw cost."""
+    global render_after_id, last_render_time
+    render_after_id = None
+    started = time.perf_counter()
+    last_render_time = started
     update_real_time_labels()
     update_main_plot()
-    if new_records_buffer and (len(new_records_buffer) >= SAVE_INTERVAL_RECORDS or (current_time - last_save_time >= SAVE_INTERVAL_SECONDS)):
-        save_to_excel(new_records_buffer)
-        new_records_buffer.clear()
-        last_save_time = current_time
-
+    next_window_ms = render_separate_windows()
+    # draw_idle() work runs at idle time; this after_idle callback fires once it has finished
+    root.after_idle(lambda: finish_render(started))
+    if next_window_ms is not None:
+        request_render(next_window_ms)
+
+def finish_render(started):
+    """Sets the next frame interval from how long the last frame took to draw."""
+    global render_interval_ms
+    cost_ms = (time.perf_counter() - started) * 1000
+    render_interval_ms = min(max(cost_ms * RENDER_COST_FACTOR, RENDER_MIN_INTERVAL_MS), RENDER_MAX_INTERVAL_MS)
+
+def plot_view_x():
+    """Returns the plot timestamps as a list, built once per data version and shared by all plots."""
+    if plot_view_cache['version'] != data_version:
+        plot_view_cache.update({'version': data_version, 'x': list(plot_timestamps), 'series': {}})
+    return plot_view_cache['x']
+
+def plot_view_series(channel, field):
+    """Returns one channel's plot_data series as a shared list, built once per data version."""
+    plot_view_x()
+    key = (channel, field)
+    if key not in plot_view_cache['series']:
+        plot_view_cache['series'][key] = list(plot_data[channel][field])
+    return plot_view_cache['series'][key]
+
+def mark_windows_dirty():
+    """Forces every open separate window to redraw on its next scheduled refresh."""
+    for state in window_render_state.values():
+        state['dirty'] = True
+
+def render_separate_windows():
+    """
+    Redraws separate channel windows that are due by their own refresh rate, visible
+    (not minimized or withdrawn) and have new data or settings since their last draw.
+    Returns milliseconds until the next window with pending changes becomes due, or None.
+    """
+    now = time.monotonic()
+    next_due_ms = None
     for ch in range(1, 5):
-        if separate_windows[ch] and window_figures[ch]:
-            update_separate_window(ch)
+        if not (separate_windows[ch] and window_figures[ch]):
+            continue
+        state = window_render_state[ch]
+        if not state['dirty'] and state['version'] == data_version:
+            continue
+        wait_ms = state['interval_ms'] - (now - state['last_draw']) * 1000
+        if wait_ms > 0:
+            next_due_ms = wait_ms if next_due_ms is None else min(next_due_ms, wait_ms)
+            continue
+        window = window_canvases[ch].get_tk_widget().winfo_toplevel()
+        if window.state() in ('iconic', 'withdrawn') or not window.winfo_viewable():
+            continue
+        update_separate_window(ch)
+        state.update({'dirty': False, 'version': data_version, 'last_draw': now})
+    return next_due_ms
 
 def update_main_plot():
     """Updates the main matplotlib plot based on active_plot_channel and plot_type."""
     for key in lines:
         lines[key].set_visible(False)
 
-    x_data = list(plot_timestamps)
+    x_data = plot_view_x()
     
     if not x_data:
         ax.set_xlim(datetime.now() - pd.Timedelta(minutes=1), datetime.now())
@@ -533,14 +2491,14 @@ def update_main_plot():
     
     if plot_type == 'temp':
         if channel_configs[active_plot_channel]['type'] == 'RES':
-            y_data = list(plot_data[active_plot_channel]['temp_prt'])
+            y_data = plot_view_series(active_plot_channel, 'temp_prt')
             if len(y_data) > 0 and len(x_data) >= len(y_data):
                 x_data_subset = x_data[-len(y_data):]
                 lines[f'ch{active_plot_channel}_prt'].set_data(x_data_subset, y_data)
                 lines[f'ch{active_plot_channel}_prt'].set_visible(True)
         elif channel_configs[active_plot_channel]['type'] == 'TC':
-            y_data_nist = list(plot_data[active_plot_channel]['temp_nist'])
-            y_data_chart = list(plot_data[active_plot_channel]['temp_chart'])
+            y_data_nist = plot_view_series(active_plot_channel, 'temp_nist')
+            y_data_chart = plot_view_series(active_plot_channel, 'temp_chart')
             if len(y_data_nist) > 0 and len(x_data) >= len(y_data_nist):
                 x_data_subset = x_data[-len(y_data_nist):]
                 lines[f'ch{active_plot_channel}_nist'].set_data(x_data_subset, y_data_nist)
@@ -551,13 +2509,13 @@ def update_main_plot():
                 lines[f'ch{active_plot_channel}_chart'].set_visible(True)
     else:
         if channel_configs[active_plot_channel]['type'] == 'RES':
-            y_data = list(plot_data[active_plot_channel]['resistance'])
+            y_data = plot_view_series(active_plot_channel, 'resistance')
             if len(y_data) > 0 and len(x_data) >= len(y_data):
                 x_data_subset = x_data[-len(y_data):]
                 lines[f'ch{active_plot_channel}_prt'].set_data(x_data_subset, y_data)
                 lines[f'ch{active_plot_channel}_prt'].set_visible(True)
         elif channel_configs[active_plot_channel]['type'] == 'TC':
-            y_data = list(plot_data[active_plot_channel]['emf'])
+            y_data = plot_view_series(active_plot_channel, 'emf')
             if len(y_data) > 0 and len(x_data) >= len(y_data):
                 x_data_subset = x_data[-len(y_data):]
                 lines[f'ch{active_plot_channel}_nist'].set_data(x_data_subset, y_data)
@@ -582,37 +2540,16 @@ def update_real_time_labels():
             labels['raw'].config(text="Disabled")
             labels['temp'].config(text="Disabled")
 
-def save_to_excel(records):
-    """Saves collected data records to an Excel file."""
-    if not records:
-        return
+def save_to_excel(rows):
+    """Appends archive rows to today's Excel log. Returns whether the save succeeded."""
+    global excel_save_failing
+    if not rows:
+        return True
     date_str = datetime.now().strftime("%Y%m%d")
     excel_file = os.path.join(save_dir_var.get(), f"fluke_1529_{date_str}.xlsx")
-    
-    # Dynamically generate columns based on current channel configurations
-    columns = ['Timestamp']
-    for i in range(1, 5):
-        if channel_configs[i]['enabled'].get():
-            if channel_configs[i]['type'] == 'RES':
-                columns.append(f'Ch{i} PRT Resistance (Ω)')
-                columns.append(f'Ch{i} PRT Temperature (°C)')
-            elif channel_configs[i]['type'] == 'TC':
-                columns.append(f'Ch{i} TC EMF (mV)')
-                columns.append(f'Ch{i} TC Temp (NIST) (°C)')
-                columns.append(f'Ch{i} TC Temp (Chart) (°C)')
-                columns.append(f'Ch{i} Difference (Chart - NIST) (°C)')
-        else:
-            if channel_configs[i]['type'] == 'RES':
-                columns.append(f'Ch{i} PRT Resistance (Ω)')
-                columns.append(f'Ch{i} PRT Temperature (°C)')
-            elif channel_configs[i]['type'] == 'TC':
-                columns.append(f'Ch{i} TC EMF (mV)')
-                columns.append(f'Ch{i} TC Temp (NIST) (°C)')
-                columns.append(f'Ch{i} TC Temp (Chart) (°C)')
-                columns.append(f'Ch{i} Difference (Chart - NIST) (°C)')
 
     try:
-        new_df = pd.DataFrame(records, columns=columns)
+        new_df = excel_log_frame(rows)
         
         if os.path.exists(excel_file):
             existing_df = pd.read_excel(excel_file)
@@ -621,14 +2558,101 @@ def save_to_excel(records):
             updated_df = new_df
         
         updated_df.to_excel(excel_file, index=False, engine='openpyxl')
-        status_var.set(f"Saved {len(records)} records to {os.path.basename(excel_file)}")
+        status_var.set(f"Saved {len(rows)} records to {os.path.basename(excel_file)}")
+        excel_save_failing = False
+        return True
+    except Exception as e:
+        status_var.set(f"Save failed: {e}; {len(new_records_buffer)} records kept for retry")
+        if not excel_save_failing:  # One dialog per outage; retries only update the status line
+            excel_save_failing = True
+            messagebox.showerror("Error", f"Excel save error: {e}\nRecords are kept and saving is retried every {SAVE_RETRY_SECONDS} s.")
+        return False
+
+def save_to_archive(rows):
+    """Appends archive rows to the per-day columnar archive files. Returns whether the save succeeded."""
+    if not rows:
+        return True
+    try:
+        archive_append_rows(save_dir_var.get(), rows)
+        return True
+    except Exception as e:
+        status_var.set(f"Archive save failed: {e}")
+        print(f"Archive save failed: {e}")
+        return False
+
+def restore_plot_state():
+    """Refills the live plot buffers and latest values from the tail of today's (and yesterday's) archive."""
+    global data_version
+    today = datetime.now().date()
+    paths = [path for path in (archive_path(save_dir_var.get(), today - timedelta(days=1)), archive_path(save_dir_var.get(), today))
+             if os.path.exists(path)]
+    if not paths:
+        return 0
+    try:
+        data = archive_tail(paths, PLOT_MAX_POINTS)
     except Exception as e:
-        status_var.set(f"Save failed: {e}")
-        messagebox.showerror("Error", f"Excel save error: {e}")
+        print(f"Could not restore plot state: {e}")
+        return 0
+    columns = {name: data[i] for i, name in enumerate(ARCHIVE_COLUMNS)}
+    timestamps = pd.to_datetime(columns['timestamp'], unit='s').to_pydatetime()
+    plot_timestamps.extend(timestamps)
+    for ch in range(1, 5):
+        if channel_configs[ch]['type'] == 'RES':
+            fields, raw_field, unit = ('resistance', 'temp_prt'), 'resistance', "Ω"
+        else:
+            fields, raw_field, unit = ('emf', 'temp_nist', 'temp_chart'), 'emf', "mV"
+        present = ~np.isnan(columns[f'ch{ch}_{raw_field}'])
+        if not present.any():
+            continue
+        for field in fields:
+            plot_data[ch][field].extend(columns[f'ch{ch}_{field}'][present].tolist())
+        last = {field: float(columns[f'ch{ch}_{field}'][present][-1]) for field in ARCHIVE_FIELDS}
+        temp_display = float(display_temperature(last['temp_prt'], last['temp_chart'], last['temp_nist']))
+        latest_values[ch]['raw'] = f"{last[raw_field]:.4f} {unit}"
+        latest_values[ch]['temp'] = f"{temp_display:.4f} °C" if not math.isnan(temp_display) else "N/A"
+    data_version += 1
+    status_var.set(f"Restored last {data.shape[1]} records from {os.path.basename(paths[-1])}")
+    return data.shape[1]
+
+def export_excel_dialog():
+    """Asks for a time range and output file, then streams the archive to xlsx in a background thread."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    start = simpledialog.askstring("Export XLSX", "Start (YYYY-MM-DD [HH:MM]):", initialvalue=today, parent=root)
+    if not start:
+        return
+    end = simpledialog.askstring("Export XLSX", "End (YYYY-MM-DD [HH:MM]):", initialvalue=today, parent=root)
+    if not end:
+        return
+    try:
+        start_dt, end_dt = parse_range_arguments(start, end)
+    except (ValueError, OverflowError) as e:
+        messagebox.showerror("Input Error", f"Invalid date: {e}")
+        return
+    excel_file = filedialog.asksaveasfilename(
+        initialdir=save_dir_var.get(), defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")],
+        initialfile=f"fluke_1529_export_{start_dt:%Y%m%d}_{end_dt:%Y%m%d}.xlsx", title="Export XLSX"
+    )
+    if not excel_file:
+        return
+    save_pending(archive_rows_buffer, save_to_archive)
+
+    def run_export():
+        try:
+            files = export_archive_to_excel(start_dt, end_dt, excel_file, save_dir=save_dir_var.get(),
+                                            progress=lambda n: status_var.set(f"Exporting... {n} records"))
+            status_var.set(f"Exported to {', '.join(os.path.basename(f) for f in files)}")
+        except Exception as e:
+            status_var.set(f"Export failed: {e}")
+        finally:
+            export_button.config(state="normal")
+
+    export_button.config(state="disabled")
+    threading.Thread(target=run_export, daemon=True).start()
 
 def start_logging():
     """Initializes and starts data logging."""
-    global new_records_buffer, plot_timestamps, plot_data, last_save_time, stop_event, data_queue, ani, current_record
+    global new_records_buffer, plot_timestamps, plot_data, last_save_time, stop_event, current_record, data_version, alarm_log_dir, \
+        last_taken_receive_time
     
     COM_PORT = com_port_var.get()
     if not COM_PORT:
@@ -641,6 +2665,14 @@ def start_logging():
         messagebox.showerror("Input Error", f"Invalid Baud Rate: {e}")
         return
 
+    try:
+        load_alarm_rules(read_alarm_rules(save_dir_var.get()))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        messagebox.showerror("Alarm Rules", f"Invalid alarm rules: {e}")
+        return
+    alarm_log_dir = save_dir_var.get()
+    active_alarms.clear()
+
     try:
         temp_ser = serial.Serial(COM_PORT, BAUD_RATE, timeout=1)
         temp_ser.close()
@@ -648,7 +2680,7 @@ def start_logging():
         messagebox.showerror("Serial Error", f"COM port {COM_PORT} is not available or in use: {se}")
         return
 
-    new_records_buffer.clear()
+    # Unsaved rows from an earlier session (e.g. a save outage) stay buffered and are saved first
     current_record.clear()
     plot_timestamps.clear()
     plot_data = {
@@ -663,16 +2695,20 @@ def start_logging():
     }
     for ch in range(1, 5):
         latest_values[ch] = {'raw': 'N/A', 'temp': 'N/A'}
+    data_version += 1
+    restore_plot_state()
     
     last_save_time = time.time()
     stop_event.clear()
-    data_queue = queue.Queue()
+    samples_ready.clear()
+    sample_transport.clear()
+    last_taken_receive_time = None
 
     status_var.set("Starting serial connection...")
     serial_thread = threading.Thread(target=serial_reader_thread, daemon=True)
     serial_thread.start()
 
-    ani = FuncAnimation(fig, animate, interval=PLOT_UPDATE_INTERVAL_MS, cache_frame_data=False)
+    ingest_tick()
     canvas.draw()
 
     start_button.config(state="disabled")
@@ -685,10 +2721,14 @@ def start_logging():
 
 def stop_logging():
     """Stops data logging and cleans up resources."""
-    global ani, ser
+    global ser, ingest_after_id, render_after_id
     stop_event.set()
-    if ani:
-        ani.event_source.stop()
+    if ingest_after_id:
+        root.after_cancel(ingest_after_id)
+        ingest_after_id = None
+    if render_after_id:
+        root.after_cancel(render_after_id)
+        render_after_id = None
     
     start_button.config(state="normal")
     stop_button.config(state="disabled")
@@ -696,38 +2736,16 @@ def stop_logging():
     for ch in range(1, 5):
         channel_buttons[ch].config(state="normal")
     
-    if new_records_buffer:
-        save_to_excel(new_records_buffer)
-        new_records_buffer.clear()
-    
     # Process any remaining partial records
     for timestamp_key in list(current_record.keys()):
         record_data = current_record[timestamp_key]
-        record = [timestamp_key]
-        for ch in range(1, 5):
-            if ch in record_data['channels']:
-                if channel_configs[ch]['type'] == 'RES':
-                    record.extend([
-                        record_data['channels'][ch]['resistance'],
-                        record_data['channels'][ch]['temp_prt']
-                    ])
-                elif channel_configs[ch]['type'] == 'TC':
-                    record.extend([
-                        record_data['channels'][ch]['emf'],
-                        record_data['channels'][ch]['temp_nist'],
-                        record_data['channels'][ch]['temp_chart'],
-                        record_data['channels'][ch]['difference']
-                    ])
-            else:
-                if channel_configs[ch]['type'] == 'RES':
-                    record.extend([float('nan'), float('nan')])
-                elif channel_configs[ch]['type'] == 'TC':
-                    record.extend([float('nan'), float('nan'), float('nan'), float('nan')])
-        new_records_buffer.append(record)
-        print(f"Processed final record for timestamp {timestamp_key}: {record}")
-    if new_records_buffer:
-        save_to_excel(new_records_buffer)
-        new_records_buffer.clear()
+        new_records_buffer.append(record_data['row'])
+        archive_rows_buffer.append(record_data['row'])
+        update_calibration(record_data['row'])
+        print(f"Processed final record for timestamp {from_epoch_seconds(timestamp_key)}: {record_data['row']}")
+    current_record.clear()
+    save_pending(new_records_buffer, save_to_excel)
+    save_pending(archive_rows_buffer, save_to_archive)
     
     if ser and ser.is_open:
         ser.close()
@@ -735,7 +2753,7 @@ def stop_logging():
     
     for ch in range(1, 5):
         if window_figures[ch]:
-            window_figures[ch].get_tk_widget().master.destroy()
+            window_canvases[ch].get_tk_widget().master.destroy()
             window_figures[ch] = None
             window_canvases[ch] = None
             window_axes[ch] = None
@@ -782,6 +2800,19 @@ def send_unit_command(channel):
         channel_configs[channel]['unit'] = unit
         channel_configs[channel]['type'] = 'RES' if unit == 'O' else 'TC'
 
+def set_thermocouple_config(channel):
+    """Applies the thermocouple type and cold-junction source selected for a channel."""
+    channel_configs[channel]['tc_type'] = tc_type_vars[channel].get()
+    cj = cj_vars[channel].get()
+    cj_channel = int(cj[2:]) if cj.startswith("Ch") else None
+    if cj_channel and channel_configs[cj_channel]['type'] != 'RES':
+        messagebox.showwarning("Cold Junction", f"Channel {cj_channel} is not a PRT channel; using a 0 °C reference.")
+        cj_vars[channel].set("0 °C")
+        cj_channel = None
+    channel_configs[channel]['cj_channel'] = cj_channel
+    cj_text = f"CJ from Ch{cj_channel} PRT" if cj_channel else "0 °C reference"
+    status_var.set(f"Channel {channel}: Type {channel_configs[channel]['tc_type']} thermocouple, {cj_text}")
+
 def set_active_channel(channel):
     """Sets the active channel for the main plot and redraws."""
     global active_plot_channel
@@ -793,14 +2824,16 @@ def set_plot_type(ptype):
     """Sets the plot type ('raw' or 'temp') for the main plot and redraws."""
     global plot_type
     plot_type = ptype
+    mark_windows_dirty()
     update_main_plot()
 
 def show_all_channels():
     """Displays all enabled channels' temperature data on the main plot."""
     global plot_type
     plot_type = 'temp'
+    mark_windows_dirty()
     
-    x_data = list(plot_timestamps)
+    x_data = plot_view_x()
     if not x_data:
         ax.set_xlim(datetime.now() - pd.Timedelta(minutes=1), datetime.now())
         ax.relim()
@@ -816,14 +2849,14 @@ def show_all_channels():
     for ch in range(1, 5):
         if channel_configs[ch]['enabled'].get():
             if channel_configs[ch]['type'] == 'RES':
-                y_data = list(plot_data[ch]['temp_prt'])
+                y_data = plot_view_series(ch, 'temp_prt')
                 if len(y_data) > 0 and len(x_data) >= len(y_data):
                     x_data_subset = x_data[-len(y_data):]
                     lines[f'ch{ch}_prt'].set_data(x_data_subset, y_data)
                     lines[f'ch{ch}_prt'].set_visible(True)
             elif channel_configs[ch]['type'] == 'TC':
-                y_data_nist = list(plot_data[ch]['temp_nist'])
-                y_data_chart = list(plot_data[ch]['temp_chart'])
+                y_data_nist = plot_view_series(ch, 'temp_nist')
+                y_data_chart = plot_view_series(ch, 'temp_chart')
                 if len(y_data_nist) > 0 and len(x_data) >= len(y_data_nist):
                     x_data_subset = x_data[-len(y_data_nist):]
                     lines[f'ch{ch}_nist'].set_data(x_data_subset, y_data_nist)
@@ -852,6 +2885,7 @@ def toggle_separate_window(channel):
             window.title(f"Channel {channel} Plot")
             window.geometry("800x600")
             window.protocol("WM_DELETE_WINDOW", lambda ch=channel: close_separate_window_callback(ch))
+            window.bind('<Map>', lambda event, ch=channel: separate_window_mapped(event, ch))
             
             fig_ch = plt.Figure(figsize=(8, 6), dpi=100)
             ax_ch = fig_ch.add_subplot(111)
@@ -868,6 +2902,15 @@ def toggle_separate_window(channel):
 
             ax_ch.legend()
 
+            refresh_frame = ttk.Frame(window, padding=5)
+            refresh_frame.pack(fill="x")
+            ttk.Label(refresh_frame, text="Refresh:").pack(side="left", padx=5)
+            refresh_var = tk.StringVar(value=next(k for k, v in SEPARATE_WINDOW_REFRESH_CHOICES.items() if v == SEPARATE_WINDOW_REFRESH_MS))
+            refresh_combo = ttk.Combobox(refresh_frame, textvariable=refresh_var, values=list(SEPARATE_WINDOW_REFRESH_CHOICES), state="readonly", width=6)
+            refresh_combo.pack(side="left")
+            refresh_combo.bind('<<ComboboxSelected>>', lambda event, ch=channel, var=refresh_var:
+                               window_render_state[ch].update({'interval_ms': SEPARATE_WINDOW_REFRESH_CHOICES[var.get()]}))
+
             canvas_ch = FigureCanvasTkAgg(fig_ch, master=window)
             canvas_ch.get_tk_widget().pack(fill="both", expand=True)
             toolbar_ch = NavigationToolbar2Tk(canvas_ch, window)
@@ -878,16 +2921,23 @@ def toggle_separate_window(channel):
             window_canvases[channel] = canvas_ch
             window_axes[channel] = ax_ch
             separate_windows[channel] = True
+            window_render_state[channel] = {'dirty': False, 'version': data_version, 'interval_ms': SEPARATE_WINDOW_REFRESH_MS, 'last_draw': time.monotonic()}
             
             update_separate_window(channel)
     else:
         close_separate_window_callback(channel)
 
+def separate_window_mapped(event, channel):
+    """Redraws a separate window when it is restored, since minimized windows are skipped by the renderer."""
+    if event.widget is event.widget.winfo_toplevel():
+        window_render_state[channel]['dirty'] = True
+        request_render()
+
 def update_separate_window(channel):
     """Updates the content of a specific separate plot window."""
     if window_figures[channel] and separate_windows[channel]:
         ax_ch = window_axes[channel]
-        x_data = list(plot_timestamps)
+        x_data = plot_view_x()
         
         if not x_data:
             ax_ch.set_xlim(datetime.now() - pd.Timedelta(minutes=1), datetime.now())
@@ -907,14 +2957,14 @@ def update_separate_window(channel):
 
         if plot_type == 'temp':
             if channel_configs[channel]['type'] == 'RES':
-                y_data = list(plot_data[channel]['temp_prt'])
+                y_data = plot_view_series(channel, 'temp_prt')
                 if len(y_data) > 0 and len(x_data) >= len(y_data):
                     x_data_subset = x_data[-len(y_data):]
                     window_lines[channel]['prt'].set_data(x_data_subset, y_data)
                     window_lines[channel]['prt'].set_visible(True)
             elif channel_configs[channel]['type'] == 'TC':
-                y_data_nist = list(plot_data[channel]['temp_nist'])
-                y_data_chart = list(plot_data[channel]['temp_chart'])
+                y_data_nist = plot_view_series(channel, 'temp_nist')
+                y_data_chart = plot_view_series(channel, 'temp_chart')
                 if len(y_data_nist) > 0 and len(x_data) >= len(y_data_nist):
                     x_data_subset = x_data[-len(y_data_nist):]
                     window_lines[channel]['nist'].set_data(x_data_subset, y_data_nist)
@@ -925,13 +2975,13 @@ def update_separate_window(channel):
                     window_lines[channel]['chart'].set_visible(True)
         else:
             if channel_configs[channel]['type'] == 'RES':
-                y_data = list(plot_data[channel]['resistance'])
+                y_data = plot_view_series(channel, 'resistance')
                 if len(y_data) > 0 and len(x_data) >= len(y_data):
                     x_data_subset = x_data[-len(y_data):]
                     window_lines[channel]['prt'].set_data(x_data_subset, y_data)
                     window_lines[channel]['prt'].set_visible(True)
             elif channel_configs[channel]['type'] == 'TC':
-                y_data = list(plot_data[channel]['emf'])
+                y_data = plot_view_series(channel, 'emf')
                 if len(y_data) > 0 and len(x_data) >= len(y_data):
                     x_data_subset = x_data[-len(y_data):]
                     window_lines[channel]['nist'].set_data(x_data_subset, y_data)
@@ -949,7 +2999,7 @@ def update_separate_window(channel):
 def close_separate_window_callback(channel):
     """Callback function for when a separate window is closed by the user."""
     if window_figures[channel]:
-        window_figures[channel].get_tk_widget().master.destroy()
+        window_canvases[channel].get_tk_widget().master.destroy()
         window_figures[channel] = None
         window_canvases[channel] = None
         window_axes[channel] = None
@@ -957,6 +3007,278 @@ def close_separate_window_callback(channel):
         separate_windows[channel] = False
         check_vars[channel].set(False)
 
+def open_history_viewer():
+    """Opens stored logs in a history window that re-reads the visible range on every zoom or pan."""
+    paths = filedialog.askopenfilenames(
+        initialdir=save_dir_var.get(), title="Open Stored Logs",
+        filetypes=[("Fluke 1529 archive", f"*{ARCHIVE_EXTENSION}"), ("Excel log", "*.xlsx")]
+    )
+    if not paths:
+        return
+    archive_paths = []
+    try:
+        for path in sorted(paths):
+            if path.lower().endswith('.xlsx'):
+                status_var.set(f"Importing {os.path.basename(path)} into archive...")
+                root.update_idletasks()
+                path = import_excel_to_archive(path)
+            if len(archive_index(path)):
+                archive_paths.append(path)
+    except Exception as e:
+        messagebox.showerror("Error", f"Could not open log: {e}")
+        return
+    if not archive_paths:
+        messagebox.showinfo("History", "The selected logs contain no records.")
+        return
+
+    close_history_viewer()
+    window = tk.Toplevel(root)
+    window.title("History: " + ", ".join(os.path.basename(p) for p in archive_paths))
+    window.geometry("1000x650")
+    window.protocol("WM_DELETE_WINDOW", close_history_viewer)
+
+    top = ttk.Frame(window, padding=5)
+    top.pack(fill="x")
+    mode_var = tk.StringVar(value='temp')
+    ttk.Radiobutton(top, text="Temp vs Time", value='temp', variable=mode_var, command=build_history_lines).pack(side="left", padx=2)
+    ttk.Radiobutton(top, text="Raw vs Time", value='raw', variable=mode_var, command=build_history_lines).pack(side="left", padx=2)
+    info_var = tk.StringVar(value="")
+    ttk.Label(top, textvariable=info_var).pack(side="right", padx=5)
+
+    fig_h = plt.Figure(figsize=(10, 6), dpi=100)
+    ax_h = fig_h.add_subplot(111)
+    ax_h.grid(True)
+    ax_h.set_xlabel("Time")
+    ax_h.xaxis_date()
+    ax_h.tick_params(axis='x', rotation=45)
+    fig_h.subplots_adjust(bottom=0.18)
+
+    canvas_h = FigureCanvasTkAgg(fig_h, master=window)
+    canvas_h.get_tk_widget().pack(fill="both", expand=True)
+    toolbar_h = NavigationToolbar2Tk(canvas_h, window)
+    toolbar_h.update()
+    toolbar_h.pack(side="bottom", fill="x")
+
+    history_view.update({'window': window, 'fig': fig_h, 'ax': ax_h, 'canvas': canvas_h, 'lines': {},
+                         'paths': archive_paths, 'mode': mode_var, 'info': info_var, 'after_id': None})
+    t_min = min(float(archive_index(p)['t_min'].min()) for p in archive_paths)
+    t_max = max(float(archive_index(p)['t_max'].max()) for p in archive_paths)
+    ax_h.set_xlim(from_epoch_seconds(t_min), from_epoch_seconds(max(t_max, t_min + 1)))
+    ax_h.callbacks.connect('xlim_changed', lambda event_ax: schedule_history_refresh())
+    build_history_lines()
+
+def build_history_lines():
+    """Creates one line per archived column that holds data for the selected history mode."""
+    ax_h = history_view['ax']
+    if ax_h is None:
+        return
+    for line in history_view['lines'].values():
+        line.remove()
+    history_view['lines'] = {}
+    if history_view['mode'].get() == 'temp':
+        fields = {'temp_prt': ('PRT Temp (°C)', '-'), 'temp_nist': ('TC Temp (NIST) (°C)', '-'), 'temp_chart': ('TC Temp (Chart) (°C)', '--')}
+        ax_h.set_ylabel("Temperature (°C)")
+    else:
+        fields = {'resistance': ('PRT Resistance (Ω)', '-'), 'emf': ('TC EMF (mV)', '-')}
+        ax_h.set_ylabel("Raw Value (Ω / mV)")
+    for ch in range(1, 5):
+        for field, (label, linestyle) in fields.items():
+            column = f'ch{ch}_{field}'
+            has_data = False
+            for path in history_view['paths']:
+                file_columns = archive_columns(path)
+                if column in file_columns and np.isfinite(archive_index(path)['col_max'][:, file_columns.index(column)]).any():
+                    has_data = True
+            if has_data:
+                history_view['lines'][column] = ax_h.plot([], [], label=f'Ch {ch} {label}', color=f'C{ch-1}', linestyle=linestyle)[0]
+    if history_view['lines']:
+        ax_h.legend(handles=list(history_view['lines'].values()))
+    refresh_history_view()
+
+def schedule_history_refresh():
+    """Debounces zoom/pan events so a burst of xlim changes triggers a single archive read."""
+    if history_view['window'] is None:
+        return
+    if history_view['after_id']:
+        root.after_cancel(history_view['after_id'])
+    history_view['after_id'] = root.after(HISTORY_REFRESH_DELAY_MS, refresh_history_view)
+
+def refresh_history_view():
+    """Reads the visible time range through the archive index, decimated to the canvas width."""
+    history_view['after_id'] = None
+    ax_h = history_view['ax']
+    if ax_h is None or not history_view['lines']:
+        return
+    started = time.perf_counter()
+    x0, x1 = ax_h.get_xlim()
+    start = to_epoch_seconds(mdates.num2date(x0).replace(tzinfo=None))
+    end = to_epoch_seconds(mdates.num2date(x1).replace(tzinfo=None))
+    n_buckets = max(history_view['canvas'].get_tk_widget().winfo_width(), 200)
+    columns = list(history_view['lines'].keys())
+    try:
+        t, values = archive_decimated(history_view['paths'], start, end, columns, n_buckets)
+    except Exception as e:
+        history_view['info'].set(f"Read error: {e}")
+        return
+    x_data = (t * 1e6).astype('int64').astype('datetime64[us]')
+    for i, column in enumerate(columns):
+        history_view['lines'][column].set_data(x_data, values[i])
+    ax_h.relim()
+    ax_h.autoscale_view(scalex=False, scaley=True)
+    history_view['canvas'].draw_idle()
+    history_view['info'].set(f"{len(t)} points in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def close_history_viewer():
+    """Closes the history window and releases its figure."""
+    if history_view['after_id']:
+        root.after_cancel(history_view['after_id'])
+    if history_view['window']:
+        history_view['window'].destroy()
+    history_view.update({'window': None, 'fig': None, 'ax': None, 'canvas': None, 'lines': {},
+                         'paths': [], 'mode': None, 'info': None, 'after_id': None})
+
+def open_calibration_view():
+    """Opens the comparison calibration window: channel roles plus live deviations and fits per DUT."""
+    if calibration_view['window']:
+        calibration_view['window'].lift()
+        return
+    window = tk.Toplevel(root)
+    window.title("Comparison Calibration")
+    window.geometry("900x300")
+    window.protocol("WM_DELETE_WINDOW", close_calibration_view)
+
+    top = ttk.Frame(window, padding=5)
+    top.pack(fill="x")
+    reference = calibration_state['reference']
+    ttk.Label(top, text="Reference:").pack(side="left", padx=2)
+    reference_var = tk.StringVar(value=f"Ch{reference}" if reference else "Off")
+    ttk.Combobox(top, textvariable=reference_var, values=["Off"] + [f"Ch{i}" for i in range(1, 5)], state="readonly", width=5).pack(side="left", padx=2)
+    ttk.Label(top, text="DUT:").pack(side="left", padx=(10, 2))
+    dut_vars = {}
+    for i in range(1, 5):
+        dut_vars[i] = tk.BooleanVar(value=i in calibration_state['sums'])
+        ttk.Checkbutton(top, text=f"Ch{i}", variable=dut_vars[i]).pack(side="left")
+    ttk.Label(top, text="Degree:").pack(side="left", padx=(10, 2))
+    degree_var = tk.StringVar(value=str(calibration_state['degree']))
+    ttk.Combobox(top, textvariable=degree_var, values=[str(d) for d in range(CALIBRATION_MAX_DEGREE + 1)], state="readonly", width=3).pack(side="left", padx=2)
+    ttk.Button(top, text="Apply", command=apply_calibration_roles).pack(side="left", padx=(10, 2))
+    ttk.Button(top, text="Reset Fit", command=lambda: (reset_calibration(), refresh_calibration_view())).pack(side="left", padx=2)
+    ttk.Button(top, text="Save Fit", command=save_calibration_fit).pack(side="left", padx=2)
+
+    columns = ("dut", "reading", "reference", "deviation", "corrected", "n", "setpoints", "coefficients", "residual")
+    headings = ("DUT", "Reading (°C)", "Reference (°C)", "Deviation (°C)", "Corrected (°C)", "Records", "Setpoints", "Coefficients c0, c1, ...", "Resid. Std (°C)")
+    tree = ttk.Treeview(window, columns=columns, show="headings", height=4)
+    for column, heading in zip(columns, headings):
+        tree.heading(column, text=heading)
+        tree.column(column, width=260 if column == "coefficients" else 85, anchor="center")
+    tree.pack(fill="both", expand=True, padx=5, pady=5)
+
+    calibration_view.update({'window': window, 'tree': tree, 'reference': reference_var, 'duts': dut_vars,
+                             'degree': degree_var, 'after_id': None})
+    refresh_calibration_view()
+
+def apply_calibration_roles():
+    """Applies the roles chosen in the calibration window and starts a new fit."""
+    reference = calibration_view['reference'].get()
+    reference = int(reference[2:]) if reference.startswith("Ch") else None
+    duts = [ch for ch, var in calibration_view['duts'].items() if var.get()]
+    try:
+        set_calibration_roles(reference, duts, int(calibration_view['degree'].get()))
+    except ValueError as e:
+        messagebox.showerror("Calibration", str(e), parent=calibration_view['window'])
+        return
+    status_var.set(f"Comparison calibration: reference Ch{reference}, DUT {', '.join(f'Ch{ch}' for ch in duts)}"
+                   if reference else "Comparison calibration off")
+    refresh_calibration_view()
+
+def refresh_calibration_view():
+    """Shows each DUT's latest deviation and current fit; repeats every CALIBRATION_REFRESH_MS while open."""
+    if calibration_view['after_id']:
+        root.after_cancel(calibration_view['after_id'])
+    tree = calibration_view['tree']
+    if tree is None:
+        return
+    tree.delete(*tree.get_children())
+    for dut in calibration_state['sums']:
+        latest = calibration_state['latest'].get(dut)
+        fit = solve_calibration(dut)
+        values = [f"Ch{dut}"] + ["-"] * 8
+        if latest:
+            values[1:4] = [f"{latest['reading']:.4f}", f"{latest['reference']:.4f}", f"{latest['deviation']:+.4f}"]
+        if fit:
+            if latest:
+                values[4] = f"{latest['reading'] - calibration_deviation(fit, latest['reading']):.4f}"
+            values[5:8] = [fit['n'], fit['setpoints'], ", ".join(f"{c:.6g}" for c in fit['coefficients'])]
+            if fit['residual_std'] is not None:
+                values[8] = f"{fit['residual_std']:.4f}"
+        tree.insert("", "end", values=values)
+    calibration_view['after_id'] = root.after(CALIBRATION_REFRESH_MS, refresh_calibration_view)
+
+def save_calibration_fit():
+    """Writes the current roles and fits to a JSON file in the save directory."""
+    if not calibration_state['sums']:
+        messagebox.showinfo("Calibration", "No DUT channels assigned.", parent=calibration_view['window'])
+        return
+    path = os.path.join(save_dir_var.get(), f"fluke_1529_calibration_{datetime.now():%Y%m%d_%H%M%S}.json")
+    try:
+        with open(path, 'w') as f:
+            json.dump(calibration_report(), f, indent=2)
+        status_var.set(f"Saved calibration fit to {os.path.basename(path)}")
+    except OSError as e:
+        messagebox.showerror("Calibration", f"Could not save fit: {e}", parent=calibration_view['window'])
+
+def close_calibration_view():
+    """Closes the calibration window; the fit keeps accumulating."""
+    if calibration_view['after_id']:
+        root.after_cancel(calibration_view['after_id'])
+    if calibration_view['window']:
+        calibration_view['window'].destroy()
+    calibration_view.update({'window': None, 'tree': None, 'reference': None, 'duts': {}, 'degree': None, 'after_id': None})
+
+def open_diagnostics_view():
+    """Opens a window showing the process RSS and the size of every bounded buffer against its budget."""
+    if diagnostics_view['window']:
+        diagnostics_view['window'].lift()
+        return
+    window = tk.Toplevel(root)
+    window.title("Diagnostics")
+    window.geometry("640x320")
+    window.protocol("WM_DELETE_WINDOW", close_diagnostics_view)
+    rss_var = tk.StringVar(value="")
+    ttk.Label(window, textvariable=rss_var, font=("Arial", 11, "bold"), padding=5).pack(fill="x")
+    columns = ("structure", "items", "budget", "memory", "spilled")
+    headings = ("Structure", "Items", "Budget", "Memory (MB)", "Spilled to Disk (MB)")
+    tree = ttk.Treeview(window, columns=columns, show="headings", height=10)
+    for column, heading in zip(columns, headings):
+        tree.heading(column, text=heading)
+        tree.column(column, width=180 if column == "structure" else 100, anchor="w" if column == "structure" else "e")
+    tree.pack(fill="both", expand=True, padx=5, pady=5)
+    diagnostics_view.update({'window': window, 'tree': tree, 'rss': rss_var, 'after_id': None})
+    refresh_diagnostics_view()
+
+def refresh_diagnostics_view():
+    """Updates the diagnostics window; repeats every DIAGNOSTICS_REFRESH_MS while it is open."""
+    tree = diagnostics_view['tree']
+    if tree is None:
+        return
+    rss = process_rss_bytes()
+    diagnostics_view['rss'].set(f"Process memory (RSS): {rss / 1e6:.1f} MB" if rss else "Process memory (RSS): not available on this platform")
+    rows = memory_report()
+    rows.append(("Alarm events queued", alarm_gui_events.qsize(), ALARM_EVENTS_MAX, 0, 0))
+    rows.append(("Separate windows open", sum(1 for fig in window_figures.values() if fig), len(window_figures), 0, 0))
+    tree.delete(*tree.get_children())
+    for name, items, budget, memory, spilled in rows:
+        tree.insert("", "end", values=(name, items, budget, f"{memory / 1e6:.2f}" if memory else "-", f"{spilled / 1e6:.2f}" if spilled else "-"))
+    diagnostics_view['after_id'] = root.after(DIAGNOSTICS_REFRESH_MS, refresh_diagnostics_view)
+
+def close_diagnostics_view():
+    """Closes the diagnostics window."""
+    if diagnostics_view['after_id']:
+        root.after_cancel(diagnostics_view['after_id'])
+    if diagnostics_view['window']:
+        diagnostics_view['window'].destroy()
+    diagnostics_view.update({'window': None, 'tree': None, 'rss': None, 'after_id': None})
+
 def browse_directory(var):
     """Opens a file dialog to select a save directory."""
     new_dir = filedialog.askdirectory(initialdir=var.get(), title="Select Save Directory")
@@ -967,7 +3289,14 @@ def on_closing():
     """Handles the application closing event."""
     if messagebox.askokcancel("Quit", "Quit application?"):
         stop_logging()
+        unsaved = max(len(new_records_buffer), len(archive_rows_buffer))
+        if unsaved and not messagebox.askyesno("Unsaved Data", f"{unsaved} records could not be saved and will be lost. Quit anyway?"):
+            return
         root.destroy()
 
-root.protocol("WM_DELETE_WINDOW", on_closing)
-root.mainloop()
+if __name__ == '__main__':
+    root.protocol("WM_DELETE_WINDOW", on_closing)
+    if restore_plot_state():
+        update_real_time_labels()
+        update_main_plot()
+    root.mainloop()